@@ -1,22 +1,18 @@
-from typing import Optional
+from typing import List, Optional
 from dotenv import load_dotenv
 from livekit.agents.llm import function_tool
 from datetime import datetime, timezone
 import logging
 
-from app.knowledge_base import KnowledgeManager
-from app.booking_manager import BookingManager
-from app.help_request import HelpRequestManager
-from app.models.booking import BookingCreate, BookingUpdate, CollectCustomerInformationArgs 
+from app.booking_manager import SlotUnavailableError
+from app.models.booking import BookingCreate, CollectCustomerInformationArgs 
 from app.models.help_request import HelpRequestCreate
 from app.models.salon_model import SalonUserData
-from app.information import INSTRUCTIONS
+from app.services import ServiceContainer, get_services
 
 import asyncio
 import json
 
-from app.slot_booking import AvailabilityChecker
-
 with open("app/json/info.json", "r") as f:
     app_data = json.load(f)
 
@@ -42,34 +38,26 @@ logger = logging.getLogger(__name__)
 class Assistant:
     """Context-aware voice assistant for a hair salon."""
     
-    def __init__(self, session: SalonUserData, ctx):
+    def __init__(self, session: SalonUserData, ctx, services: Optional[ServiceContainer] = None):
         """
         Initialize assistant with user-specific context.
         
         Args:
             session: User-specific data model
             ctx: JobContext from LiveKit
+            services: Process-wide service container (built in prewarm)
         """
         self._ctx = ctx
         self._userdata = session
         
-        # Load salon info
-        with open("app/json/info.json", "r") as f:
-            app_data = json.load(f)
-        
-        self.salon_info = {
-            "name": app_data["name"],
-            "address": app_data["address"],
-            "contact": app_data["contact"],
-            "working_hours": app_data["working_hours"],
-            "services": app_data["services"]
-        }
+        # Borrow shared clients and managers from the worker process
+        services = services or get_services()
+        self.salon_info = services.salon_info
         
-        # Initialize managers
-        self.availability_checker = AvailabilityChecker()
-        self.knowledge_base = KnowledgeManager()
-        self.booking_manager = BookingManager()
-        self.help_manager = HelpRequestManager()
+        self.availability_checker = services.availability_checker
+        self.knowledge_base = services.knowledge_base
+        self.booking_manager = services.booking_manager
+        self.help_manager = services.help_manager
         
         logger.info("Assistant initialized successfully")
     
@@ -243,16 +231,16 @@ class Assistant:
             
             # Check availability first
             try:
-                slot_available = self.availability_checker.check_availability(
+                slot_available = await self.availability_checker.check_availability(
                     appointment_date,
-                    appointment_time
+                    appointment_time,
+                    booking.service
                 )
                 
-                if not slot_available:
-                    return (
-                        f"Sorry, {appointment_time} on {appointment_date} is not available. "
-                        "Would you like to check available slots for that date?"
-                    )
+                if slot_available.status != "available":
+                    return slot_available.message
+                # Normalized slot label, e.g. "14:30" -> "2:30 PM"
+                appointment_time = slot_available.checked_time or appointment_time
             except Exception as e:
                 logger.error(f"Availability check failed: {e}")
                 return "I'm having trouble checking availability. Let me try again."
@@ -317,7 +305,9 @@ class Assistant:
             self._userdata.last_tool_called = "check_availability"
             
             # Check availability
-            result = self.availability_checker.check_availability(date, time)
+            result = await self.availability_checker.check_availability(
+                date, time, self._userdata.current_booking.service
+            )
             
             # Store result
             self._userdata.last_tool_result = {
@@ -338,6 +328,51 @@ class Assistant:
             logger.error(f"Availability check failed: {e}", exc_info=True)
             return "I'm having trouble checking availability right now. Please try again."
     
+    @function_tool
+    async def find_next_available_slots(
+        self,
+        start_date: str,
+        time: Optional[str] = None,
+        count: int = 3,
+    ) -> str:
+        """
+        Find the next open appointment slots across the coming days.
+        Use this when a date or time is fully booked, or the customer asks
+        for the next opening, instead of checking one day at a time.
+        
+        Args:
+            start_date: First date to search from, in YYYY-MM-DD format
+            time: Optional time to keep (e.g. "10:00 AM") when the customer wants the same time on another day
+            count: How many options to offer (default 3)
+            
+        Returns:
+            str: The next available date/time options
+        """
+        try:
+            self._userdata.last_tool_called = "find_next_available_slots"
+            
+            result = await self.availability_checker.find_next_available(
+                start_date,
+                count=max(1, min(count, 10)),
+                time=time,
+                service=self._userdata.current_booking.service,
+            )
+            
+            self._userdata.last_tool_result = {
+                "status": result.status,
+                "start_date": start_date,
+                "time": time,
+                "available_slots": result.available_slots
+            }
+            
+            logger.info(f"Next available slots from {start_date}: {result.available_slots}")
+            
+            return result.message
+            
+        except Exception as e:
+            logger.error(f"Next available search failed: {e}", exc_info=True)
+            return "I'm having trouble checking availability right now. Please try again."
+    
     @function_tool
     async def get_booking_summary(self) -> str:
         """
@@ -398,24 +433,8 @@ class Assistant:
         if not self._userdata.waiting_for_confirmation:
             return "Please let me show you the booking summary first so you can review it."
         
-        # Final availability check
-        try:
-            if not booking.appointment_date or not booking.appointment_time:
-                return "Booking information is incomplete. Please provide date and time."
-            
-            slot_available = self.availability_checker.check_availability(
-                booking.appointment_date,
-                booking.appointment_time
-            )
-            
-            if not slot_available:
-                return (
-                    f"I'm sorry, but {booking.appointment_time} on {booking.appointment_date} "
-                    "just became unavailable. Let me help you find another time."
-                )
-        except Exception as e:
-            logger.error(f"Final availability check failed: {e}")
-            return "I'm having trouble confirming availability. Please try again."
+        if not booking.appointment_date or not booking.appointment_time:
+            return "Booking information is incomplete. Please provide date and time."
         
         # Create booking in system
         try:
@@ -428,6 +447,7 @@ class Assistant:
                 phone_number=booking.phone_number,
             )
             
+            # The slot is reserved atomically with the write; no separate re-check
             booking_obj = await self.booking_manager.create_booking(payload)
             confirmation_number = booking_obj.confirmation_number
             
@@ -453,6 +473,12 @@ class Assistant:
             
             return result
             
+        except SlotUnavailableError:
+            self._userdata.waiting_for_confirmation = False
+            return (
+                f"I'm sorry, but {booking.appointment_time} on {booking.appointment_date} "
+                "just became unavailable. Let me help you find another time."
+            )
         except Exception as e:
             logger.error(f"Booking creation failed: {e}", exc_info=True)
             return (
@@ -558,6 +584,12 @@ class Assistant:
             logger.error(f"Error getting salon info: {e}", exc_info=True)
             return "I'm having trouble retrieving that information right now."
     
+    async def _notify_supervisor(self, question: str) -> str:
+        """Open a help request for this room (or join a matching open one)."""
+        return await self.help_manager.create_help_request(
+            HelpRequestCreate(question=question, room_name=self._ctx.room.name)
+        )
+    
     @function_tool
     async def request_help(
         self,
@@ -577,8 +609,8 @@ class Assistant:
         logger.info(f"Help requested: {question[:50]}...")
         
         try:
-            # Try knowledge base first
-            kb_result = self.knowledge_base.search(question, threshold=0.7)
+            # Try knowledge base first (curated answers, then everything)
+            kb_result = await self.knowledge_base.search_narrow_first(question, threshold=0.7)
             
             if kb_result:
                 logger.info("Answered from knowledge base")
@@ -588,6 +620,7 @@ class Assistant:
             
             # Escalate to supervisor
             logger.info("Escalating to supervisor")
+            await self._notify_supervisor(question)
             
             self._userdata.last_tool_called = "request_help"
             self._userdata.last_tool_result = "supervisor_notified"
@@ -603,4 +636,60 @@ class Assistant:
             return (
                 "I'm having trouble right now. "
                 "Please call us directly at {self.salon_info['contact']} for assistance."
-            )
\ No newline at end of file
+            )
+    
+    @function_tool
+    async def request_help_batch(
+        self,
+        questions: List[str],
+    ) -> str:
+        """
+        Answer several customer questions at once using the knowledge base.
+        Use this instead of calling request_help repeatedly when the customer
+        asks two or more non-booking questions in one go.
+        
+        Args:
+            questions: The customer's questions, one per item
+            
+        Returns:
+            str: An answer (or escalation note) for each question
+        """
+        questions = [q.strip() for q in questions if q and q.strip()]
+        if not questions:
+            return "What would you like to know?"
+        
+        logger.info(f"Batch help requested for {len(questions)} questions")
+        
+        try:
+            kb_results = await self.knowledge_base.search_many_narrow_first(questions, threshold=0.7)
+            
+            answers = []
+            escalated = []
+            for question, kb_result in zip(questions, kb_results):
+                if kb_result:
+                    answers.append(f"{question}: {kb_result['answer']}")
+                else:
+                    escalated.append(question)
+            
+            self._userdata.last_tool_called = "request_help_batch"
+            self._userdata.last_tool_result = {
+                "answered": len(answers),
+                "escalated": len(escalated),
+            }
+            
+            if escalated:
+                logger.info(f"Escalating {len(escalated)} questions to supervisor")
+                await asyncio.gather(*(self._notify_supervisor(q) for q in escalated))
+                answers.append(
+                    "I've notified my supervisor about: "
+                    f"{'; '.join(escalated)}. They'll reach out to you shortly."
+                )
+            
+            return "\n".join(answers)
+            
+        except Exception as e:
+            logger.error(f"Error in request_help_batch: {e}", exc_info=True)
+            return (
+                "I'm having trouble right now. "
+                f"Please call us directly at {self.salon_info['contact']} for assistance."
+            )
@@ -0,0 +1,115 @@
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Answer cache keyed by query embedding.
+
+    A lookup hits when a cached query lies within ``radius`` cosine
+    similarity of the new one and has not expired. Entries live in a fixed
+    capacity matrix; when it is full the oldest entry is overwritten.
+    """
+
+    def __init__(self, radius: float = 0.95, ttl_seconds: float = 600, max_items: int = 512):
+        self.radius = radius
+        self.ttl_seconds = ttl_seconds
+        self.max_items = max_items
+
+        self._matrix: Optional[np.ndarray] = None
+        self._expires = np.zeros(max_items, dtype=np.float64)
+        self._inserted = np.zeros(max_items, dtype=np.float64)
+        self._results: List[Optional[Dict[str, Any]]] = [None] * max_items
+        self._scopes: List[str] = [""] * max_items
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def _live(self, now: float) -> np.ndarray:
+        return self._expires > now
+
+    def __len__(self) -> int:
+        return int(self._live(time.monotonic()).sum())
+
+    def get(self, vector: Sequence[float], scope: str = "") -> Optional[Dict[str, Any]]:
+        """Cached answer for a nearby query asked under the same ``scope`` (e.g. search filter)."""
+        if self._matrix is None:
+            self.misses += 1
+            return None
+
+        live = self._live(time.monotonic())
+        live &= np.fromiter((s == scope for s in self._scopes), dtype=bool, count=self.max_items)
+        if not live.any():
+            self.misses += 1
+            return None
+
+        scores = self._matrix @ self._normalize(vector)
+        scores[~live] = -1.0
+        best = int(np.argmax(scores))
+
+        if scores[best] >= self.radius:
+            self.hits += 1
+            return self._results[best]
+
+        self.misses += 1
+        return None
+
+    def put(self, vector: Sequence[float], result: Dict[str, Any], scope: str = ""):
+        query = self._normalize(vector)
+        if self._matrix is None:
+            self._matrix = np.zeros((self.max_items, query.shape[0]), dtype=np.float32)
+
+        now = time.monotonic()
+        free = np.flatnonzero(~self._live(now))
+        if free.size:
+            slot = int(free[0])
+        else:
+            slot = int(np.argmin(self._inserted))
+            self.evictions += 1
+
+        self._matrix[slot] = query
+        self._expires[slot] = now + self.ttl_seconds
+        self._inserted[slot] = now
+        self._results[slot] = result
+        self._scopes[slot] = scope
+
+    def invalidate_near(self, vector: Sequence[float], radius: float) -> int:
+        """Drop every entry whose query is within ``radius`` of ``vector``."""
+        if self._matrix is None:
+            return 0
+
+        live = self._live(time.monotonic())
+        stale = live & (self._matrix @ self._normalize(vector) >= radius)
+        self._expires[stale] = 0.0
+        for slot in np.flatnonzero(stale):
+            self._results[slot] = None
+
+        count = int(stale.sum())
+        self.invalidations += count
+        return count
+
+    def clear(self):
+        self.invalidations += len(self)
+        self._expires[:] = 0.0
+        self._results = [None] * self.max_items
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "items": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
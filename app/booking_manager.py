@@ -1,11 +1,14 @@
 import asyncio
 from datetime import datetime, timezone
 import logging
-from typing import List
+from typing import Dict, List, Optional
+
+from firebase_admin import firestore
 
 from app.config.settings import booking_settings
 from app.db import FirebaseManager
 from app.models.booking import BookingCreate, BookingView
+from app.slot_booking import AvailabilityChecker
 
 
 logging.basicConfig(
@@ -15,19 +18,37 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class SlotUnavailableError(Exception):
+    """The requested slot reached MAX_BOOKINGS_PER_SLOT before the booking committed."""
+
+    def __init__(self, date: str, time: str):
+        super().__init__(f"{time} on {date} is fully booked")
+        self.date = date
+        self.time = time
+
+
 class BookingManager:
     """Manages appointment bookings in Firebase."""
     
-    def __init__(self):
-        self.firebase = FirebaseManager()
-        self.db = self.firebase.get_firestore_client()
+    def __init__(self, db=None, availability: Optional[AvailabilityChecker] = None):
+        self.db = db or FirebaseManager().get_firestore_client()
         self.collection_name = booking_settings.collection_name
+        self.availability = availability or AvailabilityChecker(db=self.db)
     
     async def create_booking(self, booking_data: BookingCreate) -> BookingView:
-        """Create a new appointment booking."""
+        """
+        Create a new appointment booking.
+
+        The slot counter for the date is incremented and the appointment
+        written in one transaction, so two callers cannot both take the
+        last seat. Services longer than one slot take a seat in each slot
+        they span. Raises SlotUnavailableError if any of them is full.
+        """
         try:
             timestamp = datetime.now(timezone.utc)
             loop = asyncio.get_event_loop()
+            date = booking_data.appointment_date or ""
+            time = booking_data.appointment_time or ""
             
             def _create():
                 timestamp_part = int(timestamp.timestamp() * 1000) % 100000
@@ -43,8 +64,39 @@ class BookingManager:
                     "cancellation_reason": None
                 })
                 
+                # Every slot the service spans takes a seat; time is stored normalized ("10am" -> "10:00 AM")
+                calendar = self.availability.calendar
+                slot_labels = calendar.labels_for(time, booking_data.service)
+                if not calendar.is_within_hours(date, slot_labels[0], booking_data.service):
+                    raise ValueError(f"{time} on {date} is outside business hours")
+                booking_dict["appointment_time"] = slot_labels[0]
+
                 doc_ref = self.db.collection(self.collection_name).document()
-                doc_ref.set(booking_dict)
+                counter_ref = self.availability.counter_ref(date)
+
+                @firestore.transactional
+                def _reserve(transaction) -> Dict[str, int]:
+                    snapshot = counter_ref.get(transaction=transaction)
+                    if snapshot.exists:
+                        slots = dict((snapshot.to_dict() or {}).get("slots", {}))
+                    else:
+                        # First counted booking for a date booked before counters existed
+                        slots = self.availability.count_bookings(
+                            transaction.get(self.availability.bookings_query(date))
+                        )
+
+                    for slot in slot_labels:
+                        if slots.get(slot, 0) >= self.availability.MAX_BOOKINGS_PER_SLOT:
+                            raise SlotUnavailableError(date, slot_labels[0])
+
+                    for slot in slot_labels:
+                        slots[slot] = slots.get(slot, 0) + 1
+                    transaction.set(counter_ref, {"slots": slots, "updated_at": timestamp})
+                    transaction.set(doc_ref, booking_dict)
+                    return {slot: slots[slot] for slot in slot_labels}
+
+                taken = _reserve(self.db.transaction())
+                self.availability.record_slot_counts(date, taken)
                 booking_dict["id"] = doc_ref.id
 
                 logger.info(f"Booking created: {confirmation_number} for {booking_data.customer_name}")
@@ -54,6 +106,9 @@ class BookingManager:
             logger.info(f"Booking created: {booking['confirmation_number']} for {booking['customer_name']}")
             return BookingView(**booking)
             
+        except SlotUnavailableError as e:
+            logger.info(f"Booking rejected: {e}")
+            raise
         except Exception as e:
             logger.error(f"Failed to create booking: {e}")
             raise
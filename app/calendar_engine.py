@@ -0,0 +1,244 @@
+import math
+import re
+from datetime import date as Date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+CLOSED_MARKERS = ("holiday", "closed")
+
+_CLOCK = re.compile(r"^\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)?\s*$", re.IGNORECASE)
+
+
+def parse_clock(text: str) -> int:
+    """
+    Minutes after midnight for "10:00 AM", "10am", "2 PM", "14:30" or "9".
+    Raises ValueError for anything else.
+    """
+    match = _CLOCK.match(text or "")
+    if not match:
+        raise ValueError(f"Unrecognised time: {text!r}")
+
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = (match.group(3) or "").replace(".", "").lower()
+    if minute > 59 or (meridiem and not 1 <= hour <= 12) or hour > 23:
+        raise ValueError(f"Unrecognised time: {text!r}")
+
+    if meridiem == "pm" and hour != 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    return hour * 60 + minute
+
+
+def format_clock(minutes: int) -> str:
+    """Slot label in the "9:00 AM" form used for appointment_time."""
+    hour, minute = divmod(minutes, 60)
+    suffix = "AM" if hour < 12 else "PM"
+    return f"{(hour % 12) or 12}:{minute:02d} {suffix}"
+
+
+def parse_hours(text: str) -> Optional[Tuple[int, int]]:
+    """(open, close) minutes for "9AM - 7PM"; None for Holiday/Closed or blank."""
+    if not text or any(marker in text.lower() for marker in CLOSED_MARKERS):
+        return None
+    opening, _, closing = text.partition("-")
+    if not closing:
+        raise ValueError(f"Unrecognised working hours: {text!r}")
+    return parse_clock(opening), parse_clock(closing)
+
+
+class CalendarEngine:
+    """
+    Slot occupancy as a boolean array of [days x buckets x capacity].
+
+    A day is cut into fixed-width buckets; a booking takes one seat in every
+    bucket its service spans. Open buckets per weekday come from
+    ``working_hours``. Days are rows allocated on demand and reused once
+    dropped, so the array only holds the dates currently loaded.
+    """
+
+    def __init__(
+        self,
+        working_hours: Dict[str, str],
+        bucket_minutes: int = 30,
+        capacity: int = 2,
+        service_durations: Optional[Dict[str, int]] = None,
+        default_duration: int = 60,
+    ):
+        self.bucket_minutes = bucket_minutes
+        self.buckets_per_day = (24 * 60) // bucket_minutes
+        self.capacity = capacity
+        self.service_durations = {k.lower(): v for k, v in (service_durations or {}).items()}
+        self.default_duration = default_duration
+
+        # weekday x bucket: is the salon open for the whole bucket
+        self.open_mask = np.zeros((7, self.buckets_per_day), dtype=bool)
+        starts = np.arange(self.buckets_per_day) * bucket_minutes
+        for weekday, name in enumerate(WEEKDAYS):
+            hours = parse_hours(str(working_hours.get(name, "")))
+            if hours:
+                opening, closing = hours
+                self.open_mask[weekday] = (starts >= opening) & (starts + bucket_minutes <= closing)
+
+        self.occupancy = np.zeros((0, self.buckets_per_day, capacity), dtype=bool)
+        self._rows: Dict[str, int] = {}
+        self._free_rows: List[int] = []
+
+    # --- time and service helpers ---
+
+    def label(self, bucket: int) -> str:
+        return format_clock(bucket * self.bucket_minutes)
+
+    def bucket_of(self, time: str) -> int:
+        """Bucket a time starts; ValueError unless it falls on a bucket boundary."""
+        minutes = parse_clock(time)
+        if minutes % self.bucket_minutes:
+            raise ValueError(f"{time} is not on a {self.bucket_minutes}-minute boundary")
+        return minutes // self.bucket_minutes
+
+    def normalize_time(self, time: str) -> str:
+        return self.label(self.bucket_of(time))
+
+    def duration_buckets(self, service: Optional[str] = None) -> int:
+        minutes = self.service_durations.get((service or "").lower(), self.default_duration)
+        return max(1, math.ceil(minutes / self.bucket_minutes))
+
+    def labels_for(self, time: str, service: Optional[str] = None) -> List[str]:
+        """Labels of every bucket a booking of ``service`` at ``time`` occupies."""
+        start = self.bucket_of(time)
+        return [self.label(b) for b in range(start, start + self.duration_buckets(service))]
+
+    # --- days ---
+
+    @staticmethod
+    def weekday(date: str) -> int:
+        return Date.fromisoformat(date).weekday()
+
+    def is_open_day(self, date: str) -> bool:
+        return bool(self.open_mask[self.weekday(date)].any())
+
+    def open_labels(self, date: str) -> List[str]:
+        return [self.label(b) for b in np.flatnonzero(self.open_mask[self.weekday(date)])]
+
+    def _row(self, date: str) -> int:
+        row = self._rows.get(date)
+        if row is not None:
+            return row
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = self.occupancy.shape[0]
+            grown = np.zeros((max(8, row * 2), self.buckets_per_day, self.capacity), dtype=bool)
+            grown[:row] = self.occupancy
+            self._free_rows = list(range(grown.shape[0] - 1, row, -1))
+            self.occupancy = grown
+        self.occupancy[row] = False
+        self._rows[date] = row
+        return row
+
+    def load_counts(self, date: str, counts: Dict[str, int]):
+        """Set a day's occupancy from per-bucket booking counts ({"10:00 AM": 2})."""
+        day = np.zeros((self.buckets_per_day, self.capacity), dtype=bool)
+        for label, count in counts.items():
+            try:
+                bucket = self.bucket_of(label)
+            except ValueError:
+                continue
+            day[bucket, : min(int(count), self.capacity)] = True
+        row = self._row(date)
+        self.occupancy[row] = day
+
+    def drop(self, date: str):
+        row = self._rows.pop(date, None)
+        if row is not None:
+            self._free_rows.append(row)
+
+    def __contains__(self, date: str) -> bool:
+        return date in self._rows
+
+    # --- queries ---
+
+    def _seats_from_counts(self, counts: Dict[str, int]) -> np.ndarray:
+        seats = np.full(self.buckets_per_day, self.capacity, dtype=np.int16)
+        for label, count in counts.items():
+            try:
+                bucket = self.bucket_of(label)
+            except ValueError:
+                continue
+            seats[bucket] = max(0, self.capacity - int(count))
+        return seats
+
+    def free_seats(
+        self, dates: Sequence[str], counts: Optional[Dict[str, Dict[str, int]]] = None
+    ) -> np.ndarray:
+        """
+        [len(dates) x buckets] free seats; zero where closed or not loaded.
+        Dates in ``counts`` are taken from those per-bucket counts instead of
+        the loaded rows, for ranges wider than the rows kept loaded.
+        """
+        counts = counts or {}
+        seats = np.zeros((len(dates), self.buckets_per_day), dtype=np.int16)
+        loaded = [i for i, date in enumerate(dates) if date not in counts and date in self._rows]
+        if loaded:
+            rows = [self._rows[dates[i]] for i in loaded]
+            seats[loaded] = self.capacity - self.occupancy[rows].sum(axis=2)
+        for i, date in enumerate(dates):
+            if date in counts:
+                seats[i] = self._seats_from_counts(counts[date])
+        weekdays = [self.weekday(date) for date in dates]
+        return np.where(self.open_mask[weekdays], seats, 0)
+
+    def free_starts(
+        self,
+        dates: Sequence[str],
+        buckets: int,
+        counts: Optional[Dict[str, Dict[str, int]]] = None,
+    ) -> np.ndarray:
+        """
+        [len(dates) x buckets_per_day] mask of start buckets where a booking
+        spanning ``buckets`` buckets has a seat free in every one of them.
+        """
+        starts = np.zeros((len(dates), self.buckets_per_day), dtype=bool)
+        if not dates or buckets > self.buckets_per_day:
+            return starts
+        windows = sliding_window_view(self.free_seats(dates, counts) > 0, buckets, axis=1)
+        starts[:, : windows.shape[1]] = windows.all(axis=2)
+        return starts
+
+    def available_starts(self, date: str, service: Optional[str] = None) -> List[str]:
+        mask = self.free_starts([date], self.duration_buckets(service))[0]
+        return [self.label(b) for b in np.flatnonzero(mask)]
+
+    def is_within_hours(self, date: str, time: str, service: Optional[str] = None) -> bool:
+        start, span = self.bucket_of(time), self.duration_buckets(service)
+        if start + span > self.buckets_per_day:
+            return False
+        return bool(self.open_mask[self.weekday(date), start:start + span].all())
+
+    def is_available(self, date: str, time: str, service: Optional[str] = None) -> bool:
+        start = self.bucket_of(time)
+        return bool(self.free_starts([date], self.duration_buckets(service))[0, start])
+
+    def next_available(
+        self,
+        dates: Sequence[str],
+        count: int,
+        service: Optional[str] = None,
+        time: Optional[str] = None,
+        counts: Optional[Dict[str, Dict[str, int]]] = None,
+    ) -> List[Tuple[str, str]]:
+        """
+        First ``count`` (date, label) openings across ``dates``, in date then
+        time order. ``counts`` is passed through to free_seats().
+        """
+        mask = self.free_starts(dates, self.duration_buckets(service), counts)
+        if time is not None:
+            only = np.zeros_like(mask)
+            bucket = self.bucket_of(time)
+            only[:, bucket] = mask[:, bucket]
+            mask = only
+        hits = np.argwhere(mask)[:count]
+        return [(dates[day], self.label(bucket)) for day, bucket in hits]
@@ -24,16 +24,76 @@ class Settings(BaseSettings):
         # extra = 'ignore'
 class BookingSettings(BaseSettings):
     collection_name: str = "appointments"
+    occupancy_cache_max_dates: int = 31  # dates kept cached (and listened to) by AvailabilityChecker
+    counters_collection: str = "slot_counters"  # one {slots: {time: count}} document per date
+    max_bookings_per_slot: int = 2
+    slot_minutes: int = 30  # calendar granularity; bookings start on these boundaries
+    default_service_minutes: int = 60  # for services missing from service_durations in info.json
 
 
 class HelpSettings(BaseSettings):
     collection_name: str = "help_requests"
+    caller_webhook_url: Optional[str] = None  # POSTed on resolution; logged to console when unset
+    webhook_timeout_seconds: float = 5
+    supervisor_webhook_url: Optional[str] = None  # POSTed on escalation; logged to console when unset
+    escalation_sla_seconds: float = 300  # pending this long -> ESCALATED
+    renotify_seconds: float = 600  # re-notify the supervisor while a request stays escalated
+    escalation_tick_seconds: float = 1
+    coalesce_similarity: float = 0.9  # a new question this close to an open one joins its request
 
 class KnowledgeSettings(BaseSettings):
     collection_name:str = "knowledge_base"
+    local_index_max_points: int = 5000  # above this, search Qdrant instead of the in-process mirror
+    lexical_min_coverage: float = 0.8  # question-term overlap needed to skip the vector search
+    lexical_margin: float = 1.5  # BM25 winner must beat the runner-up by this factor
+    fusion_lexical_weight: float = 0.1  # BM25 bonus when re-ranking vector hits
+    answer_cache_radius: float = 0.95  # cosine similarity for a cached answer to be reused
+    answer_cache_ttl_seconds: float = 600
+    answer_cache_max_items: int = 512
+    answer_cache_invalidate_radius: float = 0.7  # new knowledge drops cached answers this close
+    quantization: str = "scalar"  # "none", "scalar" (int8) or "binary"
+    quantization_rescore: bool = True  # rescore quantized candidates on original vectors
+    quantization_oversampling: float = 2.0
+    vectors_on_disk: bool = True  # keep float32 originals on disk, quantized copy in RAM
+    dedup_similarity: float = 0.95  # learned answers this close to an existing point update it in place
+    snapshot_path: str = ".cache/kb_snapshot.bin"  # local index snapshot for cold starts ("" disables)
+    snapshot_refresh_seconds: float = 300  # background refresh interval after booting from a snapshot
+
+
+class QdrantSettings(BaseSettings):
+    url: Optional[str] = None
+    api_key: Optional[str] = None
+    prefer_grpc: bool = False
+    grpc_port: int = 6334
+    pool_size: int = 10  # max pooled HTTP connections / gRPC channels
+    keepalive_seconds: float = 30.0
+    search_timeout: int = 5  # seconds, per search/query call
+    bulk_timeout: int = 60  # seconds, upserts, scrolls and collection management
+
+    class Config:
+        env_prefix = "QDRANT_"
+        env_file = ".env"
+        extra = "ignore"
+
+
+class EmbeddingSettings(BaseSettings):
+    model_name: str = "BAAI/bge-small-en-v1.5"
+    backend: str = "torch"  # "torch" or "onnx" (int8 dynamic quantization)
+    onnx_quantization: str = "avx2"  # arm64, avx2, avx512 or avx512_vnni
+    onnx_model_dir: str = ".cache/onnx/bge-small-en-v1.5"
+    max_batch_size: int = 32  # max texts per batched encode
+    batch_window_ms: float = 5.0  # how long the first request waits for others
+    cache_max_items: int = 2048  # in-memory LRU size
+    cache_dir: Optional[str] = ".cache/embeddings"  # on-disk tier, None disables it
+    disk_cache_max_items: int = 50000
+
+    class Config:
+        env_prefix = "EMBEDDING_"
 
 
 settings = Settings()
 booking_settings = BookingSettings()
 help_settings = HelpSettings()
-knowledge_settings = KnowledgeSettings()
\ No newline at end of file
+knowledge_settings = KnowledgeSettings()
+qdrant_settings = QdrantSettings()
+embedding_settings = EmbeddingSettings()
\ No newline at end of file
@@ -1,7 +1,7 @@
 import os
 import logging
 import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials, firestore, firestore_async
 
 # Configure logging
 logging.basicConfig(
@@ -16,6 +16,7 @@ class FirebaseManager:
     
     _instance = None
     _initialized = False
+    _async_db = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -53,3 +54,9 @@ class FirebaseManager:
     def get_firestore_client(self):
         """Get Firestore client instance."""
         return self.db
+
+    def get_async_firestore_client(self):
+        """Get the asyncio Firestore client (for reads on the request path)."""
+        if FirebaseManager._async_db is None:
+            FirebaseManager._async_db = firestore_async.client()
+        return FirebaseManager._async_db
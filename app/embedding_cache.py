@@ -0,0 +1,437 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_key(text: str) -> str:
+    """Casefold and strip punctuation/extra whitespace so trivial variants share a key."""
+    return " ".join(_PUNCTUATION.sub(" ", text.casefold()).split())
+
+
+class DiskEmbeddingStore:
+    """
+    Memory-mapped float32 matrix plus a JSON key index, shareable by every
+    worker process using the same directory.
+
+    Rows are written ring-buffer style: once ``max_items`` rows are used the
+    oldest row is overwritten. Writers hold an exclusive file lock and
+    catch up on rows other processes wrote before picking rows. Each row
+    also records a hash of its key, checked on read, so a process holding
+    an older index treats a row reused for another key as a miss instead
+    of returning the wrong vector.
+
+    The index is ``index.json`` (rows as of the last compaction) plus
+    ``index.log``, an append-only JSON-lines log of ``{"key", "row"}`` and
+    ``{"next_row"}`` records. A batch appends a few lines instead of
+    rewriting every key; the log is folded back into ``index.json`` once it
+    holds more than ``max_items`` records, and on close.
+    """
+
+    MATRIX_FILE = "vectors.f32"
+    HASH_FILE = "keys.u64"
+    INDEX_FILE = "index.json"
+    LOG_FILE = "index.log"
+    LOCK_FILE = "lock"
+
+    def __init__(self, path: str, dim: int, max_items: int, model_name: str):
+        self.path = path
+        self.dim = dim
+        self.max_items = max_items
+        self.model_name = model_name
+
+        os.makedirs(path, exist_ok=True)
+        self._matrix_path = os.path.join(path, self.MATRIX_FILE)
+        self._hash_path = os.path.join(path, self.HASH_FILE)
+        self._index_path = os.path.join(path, self.INDEX_FILE)
+        self._log_path = os.path.join(path, self.LOG_FILE)
+        self._lock_path = os.path.join(path, self.LOCK_FILE)
+
+        self.rows: Dict[str, int] = {}
+        self.keys: List[Optional[str]] = [None] * max_items
+        self.next_row = 0
+        self._index_version: Optional[tuple] = None
+        # Position in the log up to which this process has applied records
+        self._log_inode: Optional[int] = None
+        self._log_offset = 0
+        self._log_records = 0
+
+        with self._locked():
+            if not self._load_index():
+                self._reset()
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock across processes (a no-op where fcntl is unavailable)."""
+        with open(self._lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _key_hash(key: str) -> int:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        # Zero marks a row being written
+        return int.from_bytes(digest, "little") | 1
+
+    def _stat_index(self) -> Optional[tuple]:
+        # The index is replaced atomically, so a new inode means another writer compacted
+        try:
+            stat = os.stat(self._index_path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _index_changed(self) -> bool:
+        version = self._stat_index()
+        return version is None or version != self._index_version
+
+    def _load_index(self) -> bool:
+        paths = (self._index_path, self._matrix_path, self._hash_path)
+        if not all(os.path.exists(path) for path in paths):
+            return False
+        try:
+            version = self._stat_index()
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable embedding cache index: {e}")
+            return False
+
+        if (
+            index.get("model_name") != self.model_name
+            or index.get("dim") != self.dim
+            or index.get("max_items") != self.max_items
+        ):
+            logger.info("Embedding cache was built for a different model/shape, resetting")
+            return False
+
+        self.matrix = np.memmap(
+            self._matrix_path, dtype=np.float32, mode="r+", shape=(self.max_items, self.dim)
+        )
+        self.hashes = np.memmap(self._hash_path, dtype=np.uint64, mode="r+", shape=(self.max_items,))
+        rows = {key: int(row) for key, row in index["rows"].items()}
+        keys: List[Optional[str]] = [None] * self.max_items
+        for key, row in rows.items():
+            keys[row] = key
+        self.rows, self.keys = rows, keys
+        self.next_row = int(index.get("next_row", 0))
+        self._index_version = version
+
+        self._log_inode, self._log_offset, self._log_records = None, 0, 0
+        self._replay_log()
+        return True
+
+    def _reset(self):
+        self.matrix = np.memmap(
+            self._matrix_path, dtype=np.float32, mode="w+", shape=(self.max_items, self.dim)
+        )
+        self.hashes = np.memmap(self._hash_path, dtype=np.uint64, mode="w+", shape=(self.max_items,))
+        self.rows = {}
+        self.keys = [None] * self.max_items
+        self.next_row = 0
+        self._write_index()
+
+    def _assign(self, key: str, row: int):
+        evicted = self.keys[row]
+        if evicted is not None and evicted != key:
+            self.rows.pop(evicted, None)
+        previous = self.rows.get(key)
+        if previous is not None and previous != row and self.keys[previous] == key:
+            self.keys[previous] = None
+        self.rows[key] = row
+        self.keys[row] = key
+
+    def _replay_log(self) -> bool:
+        """
+        Apply log records appended since the last call. Returns False if the
+        log was replaced by another writer's compaction (reload the index).
+        """
+        try:
+            with open(self._log_path, "rb") as f:
+                inode = os.fstat(f.fileno()).st_ino
+                if self._log_inode is not None and inode != self._log_inode:
+                    return False
+                f.seek(self._log_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return self._log_inode is None
+        self._log_inode = inode
+
+        # A torn final line (writer died mid-append) is left for the next writer to skip
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].splitlines():
+            try:
+                record = json.loads(line)
+                if "next_row" in record:
+                    self.next_row = int(record["next_row"])
+                else:
+                    self._assign(record["key"], int(record["row"]))
+            except (ValueError, KeyError, TypeError):
+                continue
+            self._log_records += 1
+        self._log_offset += complete
+        return True
+
+    def _catch_up(self):
+        """Pick up rows other processes wrote; callers must hold the lock."""
+        if self._index_changed() or not self._replay_log():
+            if not self._load_index():
+                self._reset()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        row = self.rows.get(key)
+        if row is None:
+            return None
+        expected = self._key_hash(key)
+        if int(self.hashes[row]) != expected:
+            return None
+        vector = np.array(self.matrix[row])
+        # Re-checked so a row rewritten mid-copy is not returned
+        if int(self.hashes[row]) != expected:
+            return None
+        return vector
+
+    def put_many(self, keys: List[str], vectors: List[np.ndarray]):
+        """Write rows and append them to the index log under the lock."""
+        with self._locked():
+            self._catch_up()
+
+            next_row = self.next_row
+            records = []
+            for key, vector in zip(keys, vectors):
+                row = self.rows.get(key)
+                if row is None:
+                    row = self.next_row % self.max_items
+                    self.next_row = row + 1
+
+                self.hashes[row] = 0
+                self.matrix[row] = vector
+                self.hashes[row] = self._key_hash(key)
+                self._assign(key, row)
+                records.append({"key": key, "row": row})
+            if self.next_row != next_row:
+                records.append({"next_row": self.next_row})
+
+            self.matrix.flush()
+            self.hashes.flush()
+            self._append_log(records)
+            if self._log_records > self.max_items:
+                self._write_index()
+
+    def put(self, key: str, vector: np.ndarray):
+        self.put_many([key], [vector])
+
+    def _append_log(self, records: List[Dict[str, Any]]):
+        if not records:
+            return
+        data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        with open(self._log_path, "ab") as f:
+            inode = os.fstat(f.fileno()).st_ino
+            end = f.seek(0, os.SEEK_END)
+            if end != self._log_offset or inode != self._log_inode:
+                # Start on a fresh line after a torn record
+                data = b"\n" + data
+            f.write(data)
+            self._log_offset = end + len(data)
+        self._log_inode = inode
+        self._log_records += len(records)
+
+    def flush(self):
+        """Persist rows and compact the log into the index, under the lock."""
+        with self._locked():
+            self._catch_up()
+            self.matrix.flush()
+            self.hashes.flush()
+            if self._log_records:
+                self._write_index()
+
+    def close(self):
+        self.flush()
+
+    def _write_index(self):
+        """Write every row to ``index.json`` and start an empty log; callers hold the lock."""
+        tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "model_name": self.model_name,
+                    "dim": self.dim,
+                    "max_items": self.max_items,
+                    "next_row": self.next_row,
+                    "rows": self.rows,
+                },
+                f,
+            )
+        os.replace(tmp_path, self._index_path)
+        self._index_version = self._stat_index()
+
+        # A new inode tells other processes to reload rather than keep replaying
+        tmp_log = f"{self._log_path}.{os.getpid()}.tmp"
+        open(tmp_log, "wb").close()
+        os.replace(tmp_log, self._log_path)
+        self._log_inode = os.stat(self._log_path).st_ino
+        self._log_offset = 0
+        self._log_records = 0
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache: a bounded in-memory LRU in front of an
+    optional on-disk store that survives worker restarts.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_items: int = 2048,
+        cache_dir: Optional[str] = None,
+        disk_max_items: int = 50000,
+    ):
+        self.model_name = model_name
+        self.max_items = max_items
+        self.cache_dir = cache_dir
+        self.disk_max_items = disk_max_items
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._disk: Optional[DiskEmbeddingStore] = None
+        self._disk_checked = False
+        # The store may be opened from the event loop's thread pool and the encoder thread
+        self._disk_lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _disk_store(self, dim: int) -> Optional[DiskEmbeddingStore]:
+        with self._disk_lock:
+            if self._disk is None and self.cache_dir:
+                try:
+                    self._disk = DiskEmbeddingStore(
+                        self.cache_dir, dim, self.disk_max_items, self.model_name
+                    )
+                except OSError as e:
+                    logger.warning(f"Disk embedding cache disabled: {e}")
+                    self.cache_dir = None
+            return self._disk
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = normalize_key(text)
+
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return vector.tolist()
+
+        if self._disk is not None:
+            vector = self._disk.get(key)
+            if vector is not None:
+                self._remember(key, vector)
+                self.disk_hits += 1
+                return vector.tolist()
+
+        self.misses += 1
+        return None
+
+    async def open_disk(self):
+        """
+        Reopen a persisted store before the first lookup. Loading the index
+        is file I/O, so it runs in a thread rather than on the event loop.
+        """
+        if self._disk is None and self.cache_dir and not self._disk_checked:
+            self._disk_checked = True
+            await asyncio.to_thread(self._open_existing_disk_store)
+
+    def _open_existing_disk_store(self):
+        """Open a persisted store using its recorded dimension."""
+        index_path = os.path.join(self.cache_dir, DiskEmbeddingStore.INDEX_FILE)
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        if index.get("model_name") == self.model_name and index.get("dim"):
+            self._disk_store(int(index["dim"]))
+
+    def remember_many(self, texts: List[str], vectors: List[List[float]]):
+        """Add to the in-memory tier only."""
+        for text, vector in zip(texts, vectors):
+            self._remember(normalize_key(text), np.asarray(vector, dtype=np.float32))
+
+    def persist_many(self, texts: List[str], vectors: List[List[float]]):
+        """
+        Add to the on-disk tier in one locked write. This is file I/O, so
+        EmbeddingService runs it on its encoder thread, not the event loop.
+        """
+        if not texts:
+            return
+        disk = self._disk_store(len(vectors[0]))
+        if disk is None:
+            return
+        try:
+            disk.put_many(
+                [normalize_key(text) for text in texts],
+                [np.asarray(vector, dtype=np.float32) for vector in vectors],
+            )
+        except OSError as e:
+            logger.warning(f"Could not write embedding cache: {e}")
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]):
+        if not texts:
+            return
+        self.remember_many(texts, vectors)
+        self.persist_many(texts, vectors)
+
+    def put(self, text: str, vector: List[float]):
+        self.put_many([text], [vector])
+
+    def close(self):
+        """Fold the on-disk index log into the index."""
+        if self._disk is not None:
+            try:
+                self._disk.close()
+            except OSError as e:
+                logger.warning(f"Could not compact embedding cache: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_items": len(self._memory),
+            "disk_items": len(self._disk) if self._disk is not None else 0,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
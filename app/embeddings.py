@@ -1,9 +1,255 @@
-from sentence_transformers import SentenceTransformer
+import asyncio
+import importlib.util
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+from app.config.settings import embedding_settings
+from app.embedding_cache import EmbeddingCache, normalize_key
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
 
 _encoder = None
+_embedding_service = None
+
+def encoder_id(backend: Optional[str] = None) -> str:
+    """Identify model + backend, so cached vectors are never mixed across them."""
+    backend = backend or embedding_settings.backend
+    if backend == "onnx":
+        return f"{embedding_settings.model_name}:onnx-qint8-{embedding_settings.onnx_quantization}"
+    return f"{embedding_settings.model_name}:{backend}"
+
+
+def onnx_available() -> bool:
+    """
+    Whether the ONNX backend's extras (Optimum + ONNX Runtime) are installed.
+    sentence-transformers reports them missing with a plain Exception, so
+    check up front rather than catching it.
+    """
+    try:
+        return (
+            importlib.util.find_spec("onnxruntime") is not None
+            and importlib.util.find_spec("optimum.onnxruntime") is not None
+        )
+    except ImportError:
+        return False
+
+
+def _load_onnx_encoder() -> "SentenceTransformer":
+    """
+    Load the int8 dynamically quantized ONNX Runtime export of the model,
+    exporting and quantizing it into ``onnx_model_dir`` on first use.
+    """
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    model_dir = embedding_settings.onnx_model_dir
+    file_name = f"onnx/model_qint8_{embedding_settings.onnx_quantization}.onnx"
+
+    if not os.path.exists(os.path.join(model_dir, file_name)):
+        logger.info(f"Exporting quantized ONNX encoder to {model_dir}")
+        model = SentenceTransformer(embedding_settings.model_name, backend="onnx")
+        model.save(model_dir)
+        export_dynamic_quantized_onnx_model(
+            model, embedding_settings.onnx_quantization, model_dir
+        )
+
+    return SentenceTransformer(
+        model_dir,
+        backend="onnx",
+        model_kwargs={"file_name": file_name},
+    )
+
+
+def load_encoder(backend: Optional[str] = None, strict: bool = False) -> "SentenceTransformer":
+    """
+    Load a fresh encoder for the given backend ("torch" or "onnx"). A
+    missing ONNX runtime falls back to torch, or raises ImportError if
+    ``strict`` is set.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    backend = backend or embedding_settings.backend
+
+    if backend == "onnx":
+        if onnx_available():
+            return _load_onnx_encoder()
+        message = "Optimum and ONNX Runtime are not installed (pip install sentence-transformers[onnx])"
+        if strict:
+            raise ImportError(message)
+        logger.warning(f"ONNX backend unavailable ({message}), falling back to torch")
+    elif backend != "torch":
+        raise ValueError(f"Unknown encoder backend: {backend}")
+
+    return SentenceTransformer(embedding_settings.model_name)
+
 
 def get_encoder():
     global _encoder
     if _encoder is None:
-        _encoder = SentenceTransformer("BAAI/bge-small-en-v1.5")
+        _encoder = load_encoder()
     return _encoder
+
+
+class EmbeddingService:
+    """
+    Micro-batching front end for the sentence encoder.
+
+    Encode requests from every session in the worker are queued; the first
+    request opens a short window (or waits until the batch is full) and the
+    collected texts are encoded in one call on a dedicated thread, keeping
+    the CPU work off the event loop.
+    """
+
+    def __init__(
+        self,
+        encoder=None,
+        max_batch_size: Optional[int] = None,
+        batch_window_ms: Optional[float] = None,
+        cache: Optional[EmbeddingCache] = None,
+    ):
+        self._encoder = encoder
+        self.cache = cache or EmbeddingCache(
+            model_name=encoder_id(),
+            max_items=embedding_settings.cache_max_items,
+            cache_dir=embedding_settings.cache_dir,
+            disk_max_items=embedding_settings.disk_cache_max_items,
+        )
+        self.max_batch_size = max_batch_size or embedding_settings.max_batch_size
+        if batch_window_ms is None:
+            batch_window_ms = embedding_settings.batch_window_ms
+        self.batch_window = batch_window_ms / 1000
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedder")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+
+    @property
+    def encoder(self):
+        if self._encoder is None:
+            self._encoder = get_encoder()
+        return self._encoder
+
+    def encode(self, texts: Sequence[str]) -> List[List[float]]:
+        """Encode synchronously in one batch (for startup and scripts)."""
+        if not texts:
+            return []
+        return self.encoder.encode(list(texts)).tolist()
+
+    async def embed(self, text: str) -> List[float]:
+        """Embed a single text, sharing an encode batch with concurrent callers."""
+        vectors = await self.embed_many([text])
+        return vectors[0]
+
+    async def embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed several texts; cache misses are queued together with other callers' texts."""
+        if not texts:
+            return []
+
+        await self.cache.open_disk()
+        vectors: List[Optional[List[float]]] = [self.cache.get(text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if not missing:
+            return vectors  # type: ignore[return-value]
+
+        queue = self._ensure_worker()
+        loop = asyncio.get_running_loop()
+
+        futures = []
+        for i in missing:
+            # Identical questions already being encoded share that result
+            key = normalize_key(texts[i])
+            future = self._inflight.get(key)
+            if future is None:
+                future = loop.create_future()
+                future.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+                self._inflight[key] = future
+                queue.put_nowait((texts[i], future))
+            futures.append(future)
+
+        # Shielded: a cancelled caller must not cancel an encode other callers share
+        encoded = await asyncio.gather(*(asyncio.shield(future) for future in futures))
+
+        for i, vector in zip(missing, encoded):
+            vectors[i] = vector
+        return vectors  # type: ignore[return-value]
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue))
+        assert self._queue is not None
+        return self._queue
+
+    async def _run(self, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await queue.get()]
+
+            # Give concurrent sessions a short window to join this batch
+            if queue.qsize() + 1 < self.max_batch_size and self.batch_window > 0:
+                await asyncio.sleep(self.batch_window)
+
+            while len(batch) < self.max_batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            texts = [text for text, _ in batch]
+            self._batches += 1
+            self._items += len(batch)
+            self._largest_batch = max(self._largest_batch, len(batch))
+
+            try:
+                vectors = await loop.run_in_executor(self._executor, self.encode, texts)
+            except Exception as e:
+                logger.error(f"Batched encode failed ({len(batch)} texts): {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            # Cached here rather than by the callers, which may have been cancelled;
+            # the disk write queues behind this encode on the encoder thread
+            self.cache.remember_many(texts, vectors)
+            loop.run_in_executor(self._executor, self.cache.persist_many, texts, vectors)
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    def close(self):
+        """Wait for queued cache writes, then compact the on-disk cache."""
+        self._executor.shutdown(wait=True)
+        self.cache.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, batch fill and cache hit counters."""
+        return {
+            "cache": self.cache.stats(),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "batches": self._batches,
+            "items": self._items,
+            "largest_batch": self._largest_batch,
+            "avg_batch_size": self._items / self._batches if self._batches else 0.0,
+            "avg_batch_fill": (
+                self._items / (self._batches * self.max_batch_size)
+                if self._batches else 0.0
+            ),
+        }
+
+
+def get_embedding_service() -> EmbeddingService:
+    global _embedding_service
+    if _embedding_service is None:
+        _embedding_service = EmbeddingService()
+    return _embedding_service
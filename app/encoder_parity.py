@@ -0,0 +1,97 @@
+"""
+Parity check between the torch and quantized ONNX encoder backends.
+
+Scores a set of caller-style queries against the FAQ questions in
+info.json with both backends and fails if any cosine score drifts by more
+than the tolerance, or if the top FAQ match changes.
+
+    python -m app.encoder_parity --tolerance 0.02
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.embeddings import load_encoder
+
+PROBE_QUERIES = [
+    "what are your hours",
+    "are you open on thursday",
+    "how do I book",
+    "can I just walk in",
+    "do you cut women's hair",
+    "what services do you have",
+    "how much is a haircut",
+    "do you do facials",
+]
+
+
+def _score_matrix(encoder, queries: List[str], documents: List[str]) -> np.ndarray:
+    q = encoder.encode(queries, normalize_embeddings=True)
+    d = encoder.encode(documents, normalize_embeddings=True)
+    return np.asarray(q, dtype=np.float32) @ np.asarray(d, dtype=np.float32).T
+
+
+def _time_single_queries(encoder, queries: List[str], rounds: int = 5) -> float:
+    """Mean latency (ms) of single-query encodes, the shape of a KB lookup."""
+    encoder.encode(queries[0])  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            encoder.encode(query)
+    return (time.perf_counter() - start) * 1000 / (rounds * len(queries))
+
+
+def run_parity_check(tolerance: float = 0.02, info_path: str = "app/json/info.json") -> Dict:
+    with open(info_path, "r", encoding="utf-8") as f:
+        faqs = json.load(f)["faqs"]
+
+    documents = [faq["question"] for faq in faqs]
+    queries = PROBE_QUERIES + documents
+
+    # Strict: falling back to torch here would compare torch with itself.
+    # Load it first so a missing ONNX runtime fails before torch loads.
+    onnx_encoder = load_encoder("onnx", strict=True)
+    torch_encoder = load_encoder("torch")
+
+    torch_scores = _score_matrix(torch_encoder, queries, documents)
+    onnx_scores = _score_matrix(onnx_encoder, queries, documents)
+
+    diff = np.abs(torch_scores - onnx_scores)
+    top1_agreement = float(
+        np.mean(torch_scores.argmax(axis=1) == onnx_scores.argmax(axis=1))
+    )
+
+    return {
+        "max_abs_diff": float(diff.max()),
+        "mean_abs_diff": float(diff.mean()),
+        "top1_agreement": top1_agreement,
+        "torch_ms_per_query": _time_single_queries(torch_encoder, queries),
+        "onnx_ms_per_query": _time_single_queries(onnx_encoder, queries),
+        "tolerance": tolerance,
+        "passed": bool(diff.max() <= tolerance and top1_agreement == 1.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tolerance", type=float, default=0.02)
+    parser.add_argument("--info", default="app/json/info.json")
+    args = parser.parse_args()
+
+    try:
+        report = run_parity_check(args.tolerance, args.info)
+    except ImportError as e:
+        print(f"ONNX backend unavailable: {e}", file=sys.stderr)
+        sys.exit(1)
+    for key, value in report.items():
+        print(f"{key:>20}: {value}")
+
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
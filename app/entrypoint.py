@@ -5,12 +5,25 @@ from app.models.salon_model import SalonUserData
 from app.agent import Assistant
 from app.config.settings import settings
 from app.information import INSTRUCTIONS
+from app.services import get_services, init_services
 from livekit.agents import AgentServer
 from livekit.agents.job import JobProcess
 
 server = AgentServer()
 
 
+def prewarm(proc: JobProcess):
+    """
+    Build process-wide services once per worker process, before any call
+    is assigned, so call setup only creates per-session state.
+    """
+    vad = silero.VAD.load()
+    proc.userdata["vad"] = vad
+    proc.userdata["services"] = init_services(vad=vad)
+
+
+server.setup_fnc = prewarm
+
 
 @server.rtc_session()
 async def entrypoint(ctx: JobContext):
@@ -21,8 +34,10 @@ async def entrypoint(ctx: JobContext):
     await ctx.connect()
     
 
+    services = ctx.proc.userdata.get("services") or get_services()
+
     userdata = SalonUserData()
-    assistant_instance = Assistant(session=userdata, ctx=ctx)
+    assistant_instance = Assistant(session=userdata, ctx=ctx, services=services)
     
 
     
@@ -32,7 +47,9 @@ async def entrypoint(ctx: JobContext):
         assistant_instance.get_booking_summary,
         assistant_instance.get_salon_information,
         assistant_instance.check_availability,
+        assistant_instance.find_next_available_slots,
         assistant_instance.request_help, #Making this MultiAgents in next update
+        assistant_instance.request_help_batch,
         assistant_instance.collect_customer_information,
         assistant_instance.select_service,
         assistant_instance.schedule_appointment
@@ -43,10 +60,10 @@ async def entrypoint(ctx: JobContext):
         tools=tools,
     )
 
-    vad = ctx.proc.userdata.get("vad")
+    vad = services.vad
     if vad is None:
         vad = silero.VAD.load()
-        ctx.proc.userdata["vad"] = vad
+        services.vad = vad
 
 
     session = AgentSession(
@@ -70,5 +87,6 @@ if __name__ == "__main__":
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
         ),
     )
\ No newline at end of file
@@ -0,0 +1,205 @@
+"""
+SLA escalation for help requests.
+
+    python -m app.escalation    # run the scheduler standalone
+
+Run one scheduler per deployment: it owns the PENDING -> ESCALATED
+transition, and workers only see the result through the help request feed.
+"""
+import asyncio
+import logging
+import math
+import time
+from typing import TYPE_CHECKING, Dict, Hashable, List, Optional
+
+from app.config.settings import help_settings
+from app.models.help_request import HelpRequestStatus, HelpRequestView
+
+if TYPE_CHECKING:
+    from app.help_request import HelpRequestManager
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+ESCALATE = "escalate"
+RENOTIFY = "renotify"
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel: O(1) schedule and cancel, and each tick only looks
+    at one slot. Timers further out than one revolution stay in their slot
+    until the wheel comes round to their tick.
+    """
+
+    def __init__(self, tick_seconds: float = 1.0, slots: int = 512, now: Optional[float] = None):
+        self.tick_seconds = tick_seconds
+        self.slots: List[Dict[Hashable, int]] = [{} for _ in range(slots)]
+        self.current_tick = self._tick(time.time() if now is None else now)
+        self._slot_of: Dict[Hashable, int] = {}
+
+    def _tick(self, ts: float) -> int:
+        return math.floor(ts / self.tick_seconds)
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slot_of
+
+    def schedule(self, key: Hashable, deadline: float):
+        """(Re)schedule ``key`` to fire at ``deadline``; overdue timers fire on the next tick."""
+        self.cancel(key)
+        tick = max(math.ceil(deadline / self.tick_seconds), self.current_tick + 1)
+        slot = tick % len(self.slots)
+        self.slots[slot][key] = tick
+        self._slot_of[key] = slot
+
+    def cancel(self, key: Hashable) -> bool:
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return False
+        del self.slots[slot][key]
+        return True
+
+    def _collect(self, slot: int, up_to_tick: int, due: List[Hashable]):
+        bucket = self.slots[slot]
+        for key, tick in list(bucket.items()):
+            if tick <= up_to_tick:
+                del bucket[key]
+                del self._slot_of[key]
+                due.append(key)
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """Move the wheel to ``now`` and return the keys that came due."""
+        target = self._tick(time.time() if now is None else now)
+        due: List[Hashable] = []
+        if target - self.current_tick >= len(self.slots):
+            # Fell behind by a full revolution: every slot is due a visit anyway
+            for slot in range(len(self.slots)):
+                self._collect(slot, target, due)
+        else:
+            for tick in range(self.current_tick + 1, target + 1):
+                self._collect(tick % len(self.slots), target, due)
+        self.current_tick = max(self.current_tick, target)
+        return due
+
+
+class EscalationScheduler:
+    """
+    Escalates help requests that stay unanswered past the SLA and
+    re-notifies the supervisor while they remain escalated.
+
+    State is rebuilt from the help request feed (one query for open
+    requests, then snapshot deltas), so a restart loses nothing. Only the
+    ESCALATED transition is written to Firestore; re-notifications are not
+    persisted.
+    """
+
+    def __init__(
+        self,
+        help_manager: "HelpRequestManager",
+        sla_seconds: Optional[float] = None,
+        renotify_seconds: Optional[float] = None,
+        tick_seconds: Optional[float] = None,
+    ):
+        self.help_manager = help_manager
+        self.sla_seconds = sla_seconds or help_settings.escalation_sla_seconds
+        self.renotify_seconds = renotify_seconds or help_settings.renotify_seconds
+        self.tick_seconds = tick_seconds or help_settings.escalation_tick_seconds
+
+        self.wheel = TimerWheel(self.tick_seconds)
+        self.requests: Dict[str, HelpRequestView] = {}
+        self._actions: Dict[str, str] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def track(self, request: HelpRequestView):
+        """Schedule (or cancel) the next timer for a request from its current status."""
+        if request.status in (HelpRequestStatus.PENDING.value, HelpRequestStatus.IN_PROGRESS.value):
+            self.requests[request.id] = request
+            self._actions[request.id] = ESCALATE
+            self.wheel.schedule(request.id, request.created_at.timestamp() + self.sla_seconds)
+        elif request.status == HelpRequestStatus.ESCALATED.value:
+            self.requests[request.id] = request
+            self._actions[request.id] = RENOTIFY
+            escalated_at = request.escalated_at or request.updated_at
+            self.wheel.schedule(request.id, escalated_at.timestamp() + self.renotify_seconds)
+        else:
+            self.forget(request.id)
+
+    def forget(self, request_id: str):
+        self.wheel.cancel(request_id)
+        self.requests.pop(request_id, None)
+        self._actions.pop(request_id, None)
+
+    async def _fire(self, request_id: str):
+        request = self.requests.get(request_id)
+        action = self._actions.get(request_id)
+        if request is None:
+            return
+
+        try:
+            if action == ESCALATE:
+                escalated = await self.help_manager.mark_escalated(request)
+                self.track(escalated)
+                # Resolved elsewhere in the meantime: track() has already forgotten it
+                if escalated.status == HelpRequestStatus.ESCALATED.value:
+                    await self.help_manager.notify_supervisor(escalated, "sla_breached")
+            else:
+                self.wheel.schedule(request_id, time.time() + self.renotify_seconds)
+                await self.help_manager.notify_supervisor(request, "still_escalated")
+        except Exception as e:
+            logger.error(f"Escalation of {request_id} failed, retrying next tick: {e}")
+            self.wheel.schedule(request_id, time.time())
+
+    async def tick(self, now: Optional[float] = None) -> int:
+        """Advance the wheel and handle whatever came due; returns how many fired."""
+        due = self.wheel.advance(now)
+        if due:
+            await asyncio.gather(*(self._fire(str(request_id)) for request_id in due))
+        return len(due)
+
+    async def _follow_feed(self):
+        async for event in self.help_manager.watch(include_pending=True):
+            self.track(event.request)
+
+    async def _run_ticks(self):
+        while True:
+            await asyncio.sleep(self.tick_seconds)
+            await self.tick()
+
+    def start(self):
+        """Start following the feed and ticking on the running event loop."""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._follow_feed()),
+                asyncio.create_task(self._run_ticks()),
+            ]
+        logger.info(
+            f"Escalation scheduler started (SLA {self.sla_seconds}s, renotify {self.renotify_seconds}s)"
+        )
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+async def main():
+    from app.help_request import HelpRequestManager
+
+    scheduler = EscalationScheduler(HelpRequestManager())
+    scheduler.start()
+    try:
+        await asyncio.gather(*scheduler._tasks)
+    finally:
+        await scheduler.stop()
+        scheduler.help_manager.feed.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
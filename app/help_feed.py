@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from app.models.help_request import (
+    HelpRequestEvent,
+    HelpRequestEventType,
+    HelpRequestStatus,
+    HelpRequestView,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+RECENTLY_RESOLVED_MAX = 256
+
+OPEN_STATUSES = (
+    HelpRequestStatus.PENDING.value,
+    HelpRequestStatus.IN_PROGRESS.value,
+    HelpRequestStatus.ESCALATED.value,
+)
+
+
+class HelpRequestFeed:
+    """
+    Push feed of help request changes with a materialized view of open
+    requests.
+
+    With a Firestore client, ``start()`` seeds the view with one query for
+    open requests and then attaches an ``on_snapshot`` listener to documents
+    updated after that point, so consumers get deltas instead of re-reading
+    the collection. Without one it is a local stand-in fed only by
+    ``apply()``, which the manager also calls after its own writes; the
+    ``updated_at`` of each document makes the two sources idempotent.
+    """
+
+    def __init__(self, db=None, collection_name: str = "help_requests"):
+        self.db = db
+        self.collection_name = collection_name
+        self.pending: Dict[str, HelpRequestView] = {}
+        # So a waiter that arrives just after the answer still sees it
+        self.recently_resolved: "OrderedDict[str, HelpRequestView]" = OrderedDict()
+
+        self._lock = threading.Lock()
+        self._versions: Dict[str, str] = {}
+        self._statuses: Dict[str, str] = {}
+        self._subscribers: Set[Tuple[asyncio.Queue, asyncio.AbstractEventLoop]] = set()
+        self._watch = None
+
+    @property
+    def started(self) -> bool:
+        return self._watch is not None
+
+    def start(self):
+        """Seed the view and attach the snapshot listener (no-op for the local stand-in)."""
+        if self.db is None or self._watch is not None:
+            return
+
+        collection = self.db.collection(self.collection_name)
+        started_at = datetime.now().isoformat()
+        for doc in collection.where("status", "in", list(OPEN_STATUSES)).stream():
+            self.apply(doc.to_dict(), publish=False)
+
+        self._watch = collection.where("updated_at", ">=", started_at).on_snapshot(self._on_snapshot)
+        logger.info(f"Watching '{self.collection_name}' ({len(self.pending)} open requests)")
+
+    def stop(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    def _on_snapshot(self, _docs, changes, _read_time):
+        """Firestore listener callback (runs on a Firestore thread)."""
+        for change in changes:
+            data = change.document.to_dict() or {}
+            # updated_at only moves forward, so leaving the query means the doc was deleted
+            if change.type.name == "REMOVED":
+                self.remove(change.document.id, data)
+            else:
+                self.apply(data)
+
+    def _classify(self, previous: Optional[str], status: str) -> HelpRequestEventType:
+        if previous == status:
+            return HelpRequestEventType.UPDATED
+        if status == HelpRequestStatus.RESOLVED.value:
+            return HelpRequestEventType.RESOLVED
+        if status == HelpRequestStatus.ESCALATED.value:
+            return HelpRequestEventType.ESCALATED
+        if previous is None:
+            return HelpRequestEventType.CREATED
+        return HelpRequestEventType.UPDATED
+
+    def apply(self, data: Dict[str, Any], publish: bool = True) -> Optional[HelpRequestEvent]:
+        """Fold a help request document into the view and publish the change."""
+        try:
+            view = HelpRequestView(**data)
+        except Exception as e:
+            logger.warning(f"Skipping malformed help request document: {e}")
+            return None
+
+        version = view.updated_at.isoformat()
+        with self._lock:
+            if self._versions.get(view.id, "") >= version:
+                return None
+            self._versions[view.id] = version
+
+            previous = self._statuses.get(view.id)
+            self._statuses[view.id] = view.status
+            if view.status in OPEN_STATUSES:
+                self.pending[view.id] = view
+            else:
+                self.pending.pop(view.id, None)
+            if view.status == HelpRequestStatus.RESOLVED.value:
+                self.recently_resolved[view.id] = view
+                self.recently_resolved.move_to_end(view.id)
+                while len(self.recently_resolved) > RECENTLY_RESOLVED_MAX:
+                    self.recently_resolved.popitem(last=False)
+
+        event = HelpRequestEvent(type=self._classify(previous, view.status), request=view)
+        if publish:
+            self._publish(event)
+        return event
+
+    def remove(self, request_id: str, data: Dict[str, Any]):
+        with self._lock:
+            self._versions.pop(request_id, None)
+            self._statuses.pop(request_id, None)
+            self.pending.pop(request_id, None)
+        try:
+            self._publish(HelpRequestEvent(type=HelpRequestEventType.DELETED, request=HelpRequestView(**data)))
+        except Exception as e:
+            logger.warning(f"Could not publish deletion of {request_id}: {e}")
+
+    def _publish(self, event: HelpRequestEvent):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # Subscriber's loop is closed
+                with self._lock:
+                    self._subscribers.discard((queue, loop))
+
+    def open_requests(self) -> List[HelpRequestView]:
+        with self._lock:
+            return sorted(self.pending.values(), key=lambda view: view.created_at)
+
+    def _subscribe(self) -> Tuple[asyncio.Queue, asyncio.AbstractEventLoop]:
+        subscriber = (asyncio.Queue(), asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def _unsubscribe(self, subscriber: Tuple[asyncio.Queue, asyncio.AbstractEventLoop]):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    async def stream(self, include_pending: bool = True) -> AsyncIterator[HelpRequestEvent]:
+        """
+        Yield help request events as they happen. With ``include_pending``
+        the currently open requests are replayed first as CREATED events.
+        """
+        subscriber = self._subscribe()
+        backlog = self.open_requests() if include_pending else []
+
+        try:
+            for view in backlog:
+                yield HelpRequestEvent(type=HelpRequestEventType.CREATED, request=view)
+            while True:
+                yield await subscriber[0].get()
+        finally:
+            self._unsubscribe(subscriber)
+
+    async def wait_for_answer(self, request_id: str, timeout: Optional[float] = None) -> Optional[HelpRequestView]:
+        """Wait until the request is resolved; None on timeout."""
+        subscriber = self._subscribe()
+        try:
+            with self._lock:
+                resolved = self.recently_resolved.get(request_id)
+            if resolved is not None:
+                return resolved
+
+            async def next_resolution() -> HelpRequestView:
+                while True:
+                    event = await subscriber[0].get()
+                    if event.request.id == request_id and event.type == HelpRequestEventType.RESOLVED:
+                        return event.request
+
+            return await asyncio.wait_for(next_resolution(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._unsubscribe(subscriber)
@@ -1,19 +1,33 @@
 import asyncio
+import base64
 from datetime import datetime
+import json
 import logging
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Sequence, Union
 from uuid import uuid4
-from qdrant_client.models import PointStruct
-from qdrant_client import QdrantClient
-from app.config.settings import help_settings
+import aiohttp
+from firebase_admin import firestore
+from qdrant_client import AsyncQdrantClient
+from app.config.settings import help_settings, knowledge_settings
 from app.db import FirebaseManager
-from app.embeddings import get_encoder
-from app.knowledge_base import QDRANT_API_KEY, QDRANT_COLLECTION, QDRANT_URL
+from app.help_feed import HelpRequestFeed
+from app.embeddings import EmbeddingService, get_embedding_service
+from app.vector_index import LocalVectorIndex
+from app.models.knowledge import KnowledgeFilter, KnowledgeSource
 from app.models.help_request import (
     HelpRequestCreate,
+    HelpRequestEvent,
+    HelpRequestPage,
     HelpRequestStatus,
+    HelpRequestSummary,
     HelpRequestView,
+    SupervisorResponse,
 )
 
+if TYPE_CHECKING:
+    from app.knowledge_base import KnowledgeManager
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -21,27 +35,137 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+UNRESOLVED_STATUSES = [
+    HelpRequestStatus.PENDING,
+    HelpRequestStatus.IN_PROGRESS,
+    HelpRequestStatus.ESCALATED,
+]
+
+SUMMARY_FIELDS = list(HelpRequestSummary.model_fields)
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at: str, request_id: str) -> str:
+    raw = json.dumps([created_at, request_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Dict[str, str]:
+    try:
+        created_at, request_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    return {"created_at": created_at, "__name__": request_id}
+
+
+def caller_rooms(room_name: Optional[str], subscribers: Optional[Sequence[Optional[str]]]) -> List[str]:
+    """The original caller's room plus every coalesced subscriber, without repeats."""
+    return list(dict.fromkeys(room for room in [room_name, *(subscribers or [])] if room))
+
+
 class HelpRequestManager:
     """Manages help requests with webhook notifications to supervisor."""
     
-    def __init__(self):
-        self.firebase = FirebaseManager()
-        self.db = self.firebase.get_firestore_client()
+    def __init__(
+        self,
+        db=None,
+        qdrant: Optional[AsyncQdrantClient] = None,
+        encoder=None,
+        embedder: Optional[EmbeddingService] = None,
+        knowledge: Optional["KnowledgeManager"] = None,
+        feed: Optional[HelpRequestFeed] = None,
+    ):
+        self.db = db or FirebaseManager().get_firestore_client()
         self.collection_name = help_settings.collection_name
-        self.qdrant = QdrantClient(
-            url=QDRANT_URL,
-            api_key=QDRANT_API_KEY
-        )
-        self.qdrant_collection = QDRANT_COLLECTION
-        self.encoder = get_encoder()
+        self.qdrant = qdrant
+        self.qdrant_collection = knowledge_settings.collection_name
+        self.encoder = encoder
+        self.embedder = embedder or get_embedding_service()
+        self._knowledge = knowledge
+        self.feed = feed or HelpRequestFeed(self.db, self.collection_name)
+
+        # Open questions by embedding, so duplicates asked from other rooms coalesce
+        self.open_questions = LocalVectorIndex()
+        self._coalesce_lock = asyncio.Lock()
   
+    @property
+    def knowledge(self) -> "KnowledgeManager":
+        """
+        The knowledge base, built on first use when none was passed in, so
+        processes that never touch it (the escalation scheduler) skip
+        loading info.json, the encoder and the Qdrant clients.
+        """
+        if self._knowledge is None:
+            from app.knowledge_base import KnowledgeManager
+
+            self._knowledge = KnowledgeManager(
+                aqdrant=self.qdrant, encoder=self.encoder, embedder=self.embedder
+            )
+        return self._knowledge
+
     async def _run_in_executor(self, func, *args):
         """Run synchronous Firebase operations in executor."""
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(None, func, *args)
     
+    async def _sync_open_questions(self):
+        """Bring the open-question index in line with the feed's open requests."""
+        if not self.feed.started:
+            await self._run_in_executor(self.feed.start)
+
+        pending = {view.id: view for view in self.feed.open_requests()}
+        closed = [request_id for request_id in self.open_questions.ids if request_id not in pending]
+        if closed:
+            self.open_questions.delete(closed)
+
+        missing = [view for request_id, view in pending.items() if request_id not in self.open_questions]
+        if missing:
+            vectors = await self.embedder.embed_many([view.question for view in missing])
+            self.open_questions.upsert_many(
+                [view.id for view in missing], vectors, [{"question": view.question} for view in missing]
+            )
+
+    async def _attach_subscriber(self, request: HelpRequestView, room_name: Optional[str]) -> str:
+        """Join a caller to an open request asking the same thing."""
+        subscribers = caller_rooms(request.room_name, [*request.subscribers, room_name])
+        if set(subscribers) != set(request.subscribers):
+            timestamp = datetime.now()
+            doc_ref = self.db.collection(self.collection_name).document(request.id)
+            # Requests created before subscribers existed only name their caller in room_name
+            await self._run_in_executor(
+                doc_ref.update,
+                {"subscribers": firestore.ArrayUnion(subscribers), "updated_at": timestamp.isoformat()},
+            )
+            updated = request.model_copy(
+                update={"subscribers": subscribers, "updated_at": timestamp}
+            )
+            self.feed.apply(updated.model_dump(mode='json'))
+
+        logger.info(f"Coalesced question from {room_name} into help request {request.id}")
+        return request.id
+
     async def create_help_request(self, payload: HelpRequestCreate) -> str:
-        """Create a new help request and notify supervisor via webhook."""
+        """
+        Create a new help request and notify supervisor via webhook.
+
+        If an open request already asks the same thing (within
+        ``coalesce_similarity``), the caller is added to its subscribers and
+        that request's id is returned instead.
+        """
+        async with self._coalesce_lock:
+            vector = await self.embedder.embed(payload.question)
+            await self._sync_open_questions()
+
+            for score, existing_id, _ in self.open_questions.search(vector, top_k=1):
+                existing = self.feed.pending.get(existing_id)
+                if existing is not None and score >= help_settings.coalesce_similarity:
+                    return await self._attach_subscriber(existing, payload.room_name)
+
+            request_id = await self._create_request_doc(payload)
+            self.open_questions.upsert(request_id, vector, {"question": payload.question})
+            return request_id
+
+    async def _create_request_doc(self, payload: HelpRequestCreate) -> str:
         request_id = str(uuid4())
         timestamp = datetime.now()
 
@@ -51,6 +175,7 @@ class HelpRequestManager:
                 answer=None,
                 status=HelpRequestStatus.PENDING.value,
                 room_name=payload.room_name,
+                subscribers=caller_rooms(payload.room_name, []),
                 created_at=timestamp,
                 updated_at=timestamp,
                 resolution_notes=None,
@@ -67,61 +192,307 @@ class HelpRequestManager:
             return request_id
 
         await self._run_in_executor(write_doc)
+        self.feed.apply(doc_data.model_dump(mode='json'))
         logger.info(f"Help request created: {request_id}  - {payload.question}")
 
         return request_id
 
-    async def _store_in_qdrant(self, question: str, answer: str, request_id: str):
-        """Store resolved question-answer pair in Qdrant vector database."""
-        try:
-            embedding = self.encoder.encode(question).tolist()
-            
-            point = PointStruct(
-                id=str(uuid4()),
-                vector=embedding,
-                payload={
-                    "question": question,
-                    "answer": answer,
-                    "type": "supervisor_resolved",
-                    "request_id": request_id,
-                    "created_at": datetime.now().isoformat()
-                }
+    async def _store_in_qdrant(
+        self, question: str, answer: str, request_id: str, category: str = "general"
+    ):
+        """
+        Store resolved question-answer pair in Qdrant vector database.
+        A near-identical earlier question is updated in place.
+        """
+        await self.knowledge.add_knowledge(
+            question,
+            answer,
+            category=category,
+            source=KnowledgeSource.SUPERVISOR_RESOLVED,
+            extra={"type": "supervisor_resolved", "request_id": request_id},
+        )
+        logger.info(f"Stored Q&A in Qdrant for request {request_id}")
+
+    @staticmethod
+    async def _post_webhook(url: Optional[str], message: Dict[str, Any], label: str):
+        """POST ``message`` to ``url``, or log it when no webhook is configured."""
+        if not url:
+            logger.info(f"[{label}] {message}")
+            return
+
+        timeout = aiohttp.ClientTimeout(total=help_settings.webhook_timeout_seconds)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.post(url, json=message) as resp:
+                resp.raise_for_status()
+
+    async def _notify_caller(self, request: Dict[str, Any], answer: str):
+        """
+        Send the answer back to every caller waiting on the request (webhook,
+        or console without one). Coalesced requests fan out to each room.
+        """
+        rooms = caller_rooms(request.get("room_name"), request.get("subscribers"))
+        messages = [
+            {
+                "request_id": request["id"],
+                "room_name": room_name,
+                "question": request["question"],
+                "answer": answer,
+            }
+            for room_name in rooms
+        ]
+        await asyncio.gather(
+            *(
+                self._post_webhook(help_settings.caller_webhook_url, message, "caller callback")
+                for message in messages
             )
-            
-            self.qdrant.upsert(
-                collection_name=self.qdrant_collection,
-                points=[point]
+        )
+
+    async def notify_supervisor(self, request: HelpRequestView, reason: str):
+        """Tell the supervisor a request needs attention (webhook, or console without one)."""
+        message = {
+            "request_id": request.id,
+            "room_name": request.room_name,
+            "question": request.question,
+            "status": request.status,
+            "reason": reason,
+            "created_at": request.created_at.isoformat(),
+        }
+        await self._post_webhook(help_settings.supervisor_webhook_url, message, "supervisor alert")
+
+    async def mark_escalated(self, request: HelpRequestView) -> HelpRequestView:
+        """
+        Persist the PENDING -> ESCALATED transition and publish it on the
+        feed. The status is re-read in a transaction, so a request resolved
+        elsewhere is returned as it stands instead of being escalated.
+        """
+        now = datetime.now()
+        update = {
+            "status": HelpRequestStatus.ESCALATED.value,
+            "escalated_at": now.isoformat(),
+            "updated_at": now.isoformat(),
+        }
+        doc_ref = self.db.collection(self.collection_name).document(request.id)
+        escalatable = (HelpRequestStatus.PENDING.value, HelpRequestStatus.IN_PROGRESS.value)
+
+        @firestore.transactional
+        def _escalate(transaction) -> Dict[str, Any]:
+            snapshot = doc_ref.get(transaction=transaction)
+            current = (snapshot.to_dict() or {}) if snapshot.exists else {}
+            if current.get("status") not in escalatable:
+                return current
+            transaction.update(doc_ref, update)
+            return {**current, **update}
+
+        data = await self._run_in_executor(_escalate, self.db.transaction())
+        if not data:
+            raise ValueError(f"Help request {request.id} not found")
+
+        view = HelpRequestView(**data)
+        self.feed.apply(view.model_dump(mode='json'))
+        if view.status == HelpRequestStatus.ESCALATED.value:
+            logger.info(f"Help request escalated: {request.id}")
+        else:
+            logger.info(f"Help request {request.id} is {view.status}, not escalating")
+        return view
+
+    @staticmethod
+    async def _timed(coro) -> float:
+        started = time.perf_counter()
+        await coro
+        return (time.perf_counter() - started) * 1000
+
+    async def resolve_help_request(
+        self,
+        request_id: str,
+        response: SupervisorResponse,
+        resolved_by: str = "supervisor",
+    ) -> Dict[str, Any]:
+        """
+        Resolve a pending help request.
+
+        The Firestore update, the knowledge base upsert (if
+        ``add_to_knowledge_base``) and the caller callback run concurrently;
+        a failing stage does not cancel the others. Returns per-stage
+        latency in ms and the error of any stage that failed.
+        """
+        started = time.perf_counter()
+        doc_ref = self.db.collection(self.collection_name).document(request_id)
+
+        snapshot = await self._run_in_executor(doc_ref.get)
+        if not snapshot.exists:
+            raise ValueError(f"Help request {request_id} not found")
+        request = snapshot.to_dict()
+        if request.get("status") == HelpRequestStatus.RESOLVED.value:
+            raise ValueError(f"Help request {request_id} is already resolved")
+        fetch_ms = (time.perf_counter() - started) * 1000
+
+        resolved_at = datetime.now()
+        created_at = datetime.fromisoformat(request["created_at"])
+        update = {
+            "answer": response.answer,
+            "status": HelpRequestStatus.RESOLVED.value,
+            "resolution_notes": response.resolution_notes,
+            "resolved_by": resolved_by,
+            "resolved_at": resolved_at.isoformat(),
+            "updated_at": resolved_at.isoformat(),
+            "response_time_seconds": (resolved_at - created_at).total_seconds(),
+        }
+
+        stages = {
+            "firestore": self._run_in_executor(doc_ref.update, update),
+            "notify": self._notify_caller(request, response.answer),
+        }
+        if response.add_to_knowledge_base:
+            stages["knowledge_base"] = self._store_in_qdrant(
+                request["question"], response.answer, request_id, response.kb_category
             )
-            logger.info(f"Stored Q&A in Qdrant for request {request_id}")
-            
-        except Exception as e:
-            logger.error(f"Error storing in Qdrant: {e}")
+
+        results = await asyncio.gather(
+            *(self._timed(coro) for coro in stages.values()), return_exceptions=True
+        )
+
+        report: Dict[str, Any] = {
+            "request_id": request_id,
+            "response_time_seconds": update["response_time_seconds"],
+            "stages_ms": {"fetch": round(fetch_ms, 2)},
+            "errors": {},
+        }
+        for stage, result in zip(stages, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Resolution stage '{stage}' failed for {request_id}: {result}")
+                report["errors"][stage] = str(result)
+            else:
+                report["stages_ms"][stage] = round(result, 2)
+        report["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+        if "firestore" not in report["errors"]:
+            self.feed.apply({**request, **update})
+            self.open_questions.delete([request_id])
+
+        logger.info(f"Resolved help request {request_id} {report['stages_ms']}")
+        return report
+
+    async def list_help_requests(
+        self,
+        status: Union[HelpRequestStatus, Sequence[HelpRequestStatus], None] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> HelpRequestPage:
+        """
+        One page of help requests, newest first.
+
+        Filters on status and a ``created_at`` range, pages with
+        ``start_after`` on (created_at, document id) and projects only
+        ``fields`` (default: the summary fields), so each page reads
+        ``page_size`` documents regardless of history size. Needs the
+        composite indexes in firestore.indexes.json.
+        """
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        statuses = [status] if isinstance(status, HelpRequestStatus) else list(status or [])
+        projection = list(dict.fromkeys(["id", "created_at", *(fields or SUMMARY_FIELDS)]))
+
+        query = self.db.collection(self.collection_name)
+        if len(statuses) == 1:
+            query = query.where("status", "==", statuses[0].value)
+        elif statuses:
+            query = query.where("status", "in", [s.value for s in statuses])
+        # created_at is stored as an ISO string, which sorts chronologically
+        if since:
+            query = query.where("created_at", ">=", since.isoformat())
+        if until:
+            query = query.where("created_at", "<", until.isoformat())
+
+        query = (
+            query.order_by("created_at", direction=firestore.Query.DESCENDING)
+            .order_by("__name__", direction=firestore.Query.DESCENDING)
+            .select(projection)
+        )
+        if cursor:
+            query = query.start_after(decode_cursor(cursor))
+        # One extra document tells us whether there is a next page
+        query = query.limit(page_size + 1)
+
+        docs = await self._run_in_executor(lambda: list(query.stream()))
+
+        items = []
+        for doc in docs[:page_size]:
+            data = doc.to_dict()
+            data.setdefault("id", doc.id)
+            data.setdefault("question", "")
+            data.setdefault("status", "")
+            items.append(HelpRequestSummary(**data))
+
+        next_cursor = None
+        if len(docs) > page_size:
+            last = docs[page_size - 1]
+            next_cursor = encode_cursor(last.to_dict()["created_at"], last.id)
+
+        return HelpRequestPage(items=items, next_cursor=next_cursor)
+
+    async def list_pending_requests(self, **kwargs) -> HelpRequestPage:
+        return await self.list_help_requests(status=HelpRequestStatus.PENDING, **kwargs)
+
+    async def list_resolved_requests(self, **kwargs) -> HelpRequestPage:
+        return await self.list_help_requests(status=HelpRequestStatus.RESOLVED, **kwargs)
+
+    async def list_unresolved_requests(self, **kwargs) -> HelpRequestPage:
+        return await self.list_help_requests(status=UNRESOLVED_STATUSES, **kwargs)
+
+    async def watch(self, include_pending: bool = True) -> AsyncIterator[HelpRequestEvent]:
+        """
+        Stream help request changes (created, resolved, escalated, ...) as
+        they happen, starting the snapshot listener on first use.
+        """
+        if not self.feed.started:
+            await self._run_in_executor(self.feed.start)
+        async for event in self.feed.stream(include_pending):
+            yield event
+
+    def pending_requests(self) -> List[HelpRequestView]:
+        """Open requests from the materialized view (no Firestore read)."""
+        return self.feed.open_requests()
+
+    async def wait_for_answer(self, request_id: str, timeout: Optional[float] = None) -> Optional[HelpRequestView]:
+        """Wait for a supervisor to resolve ``request_id``; None on timeout."""
+        if not self.feed.started:
+            await self._run_in_executor(self.feed.start)
+        return await self.feed.wait_for_answer(request_id, timeout)
 
     async def search_similar_resolved_questions(self, query: str, limit: int = 3, score_threshold: float = 0.7):
         """Search for similar resolved questions in Qdrant."""
+        results = await self.search_similar_resolved_questions_many([query], limit, score_threshold)
+        return results[0]
+
+    async def search_similar_resolved_questions_many(
+        self,
+        queries: List[str],
+        limit: int = 3,
+        score_threshold: float = 0.7,
+    ) -> List[List[Dict[str, Any]]]:
+        """Similar supervisor-resolved questions for several queries in one batched lookup."""
         try:
-            # Create embedding for query
-            query_embedding = self.encoder.encode(query).tolist()
-            
-            # Search in Qdrant
-            results = self.qdrant.search(
-                collection_name=self.qdrant_collection,
-                query_vector=query_embedding,
-                limit=limit,
-                threshold=score_threshold
+            results = await self.knowledge.search_filtered_many(
+                queries,
+                KnowledgeFilter(source=KnowledgeSource.SUPERVISOR_RESOLVED.value),
+                top_k=limit,
+                score_threshold=score_threshold,
             )
-            
-            similar_qas = []
-            for result in results:
-                similar_qas.append({
-                    "question": result.payload["question"],
-                    "answer": result.payload["answer"],
-                    "similarity_score": result.score,
-                    "request_id": result.payload.get("request_id")
-                })
-            
-            return similar_qas
-            
+            return [
+                [
+                    {
+                        "question": hit["question"],
+                        "answer": hit["answer"],
+                        "similarity_score": hit["score"],
+                        "request_id": hit["request_id"],
+                    }
+                    for hit in hits
+                ]
+                for hits in results
+            ]
+
         except Exception as e:
             logger.error(f"✗ Error searching Qdrant: {e}")
-            return []
+            return [[] for _ in queries]
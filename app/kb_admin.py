@@ -0,0 +1,131 @@
+"""
+Knowledge base maintenance commands.
+
+    python -m app.kb_admin sync     # incremental FAQ sync from info.json
+    python -m app.kb_admin eval     # recall/latency of lexical vs hybrid retrieval
+    python -m app.kb_admin export   # write the collection to a snapshot file
+    python -m app.kb_admin import   # restore the collection from a snapshot file
+    python -m app.kb_admin compact  # collapse near-duplicate learned answers
+"""
+import argparse
+import asyncio
+import json
+
+from qdrant_client.models import PointStruct
+
+from app.config.settings import qdrant_settings
+from app.embeddings import encoder_id
+from app.kb_snapshot import read_snapshot
+from app.knowledge_base import KnowledgeManager, batch
+
+
+def cmd_sync(args):
+    manager = KnowledgeManager()
+    try:
+        manager._init_collection()
+        summary = manager._sync_faqs()
+        print(json.dumps(summary))
+    finally:
+        manager.close()
+
+
+def _default_labelled(manager: KnowledgeManager):
+    """FAQ questions as a caller might phrase them, labelled with the FAQ they should hit."""
+    labelled = []
+    for faq in manager._valid_faqs():
+        question = faq["question"]
+        labelled.append((question.lower().rstrip("?"), question))
+        labelled.append((f"hi, quick question - {question.lower()}", question))
+    return labelled
+
+
+def cmd_eval(args):
+    manager = KnowledgeManager()
+    try:
+        manager.load_local_index()
+        if args.file:
+            with open(args.file, "r", encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            labelled = [(row["query"], row["expected_question"]) for row in rows]
+        else:
+            labelled = _default_labelled(manager)
+
+        report = asyncio.run(manager.evaluate_retrieval(labelled, args.threshold))
+        print(json.dumps(report, indent=2))
+    finally:
+        manager.close()
+
+
+def cmd_export(args):
+    manager = KnowledgeManager()
+    try:
+        # Export regardless of local_index_max_points: the snapshot is the whole collection
+        manager.local_index.load_from_qdrant(manager.qdrant, manager.collection_name)
+        count = manager.save_snapshot(args.path)
+        print(json.dumps({"exported": count, "path": args.path or manager.snapshot_path}))
+    finally:
+        manager.close()
+
+
+def cmd_import(args):
+    manager = KnowledgeManager()
+    try:
+        path = args.path or manager.snapshot_path
+        snapshot = read_snapshot(path, model_name=encoder_id())
+        manager._init_collection()
+
+        points = (
+            PointStruct(id=point_id, vector=vector.tolist(), payload=payload)
+            for point_id, vector, payload in zip(snapshot.ids, snapshot.vectors, snapshot.payloads)
+        )
+        for chunk in batch(points, size=256):
+            manager.qdrant.upsert(
+                collection_name=manager.collection_name,
+                points=chunk,
+                timeout=qdrant_settings.bulk_timeout,
+            )
+        print(json.dumps({"imported": len(snapshot), "path": path}))
+    finally:
+        manager.close()
+
+
+def cmd_compact(args):
+    manager = KnowledgeManager()
+    try:
+        summary = manager.compact_duplicates(args.similarity, dry_run=args.dry_run)
+        print(json.dumps(summary))
+    finally:
+        manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Knowledge base maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sync = commands.add_parser("sync", help="Incrementally sync FAQs from info.json")
+    sync.set_defaults(func=cmd_sync)
+
+    evaluate = commands.add_parser("eval", help="Report recall and latency per retrieval path")
+    evaluate.add_argument("--file", help="JSONL of {query, expected_question}")
+    evaluate.add_argument("--threshold", type=float, default=0.7)
+    evaluate.set_defaults(func=cmd_eval)
+
+    export = commands.add_parser("export", help="Write the collection to a snapshot file")
+    export.add_argument("--path", help="Snapshot file (default: knowledge_settings.snapshot_path)")
+    export.set_defaults(func=cmd_export)
+
+    restore = commands.add_parser("import", help="Upsert a snapshot file into the collection")
+    restore.add_argument("--path", help="Snapshot file (default: knowledge_settings.snapshot_path)")
+    restore.set_defaults(func=cmd_import)
+
+    compact = commands.add_parser("compact", help="Collapse near-duplicate learned answers")
+    compact.add_argument("--similarity", type=float, help="Default: knowledge_settings.dedup_similarity")
+    compact.add_argument("--dry-run", action="store_true", help="Report groups without writing")
+    compact.set_defaults(func=cmd_compact)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Single-file snapshot of the knowledge collection for cold starts.
+
+Layout::
+
+    MAGIC (8 bytes) | header length (uint64 LE) | JSON header
+    | padding to 64 bytes | float32 vectors [count x dim] | JSON payload block
+
+The vector block is memory-mapped on load, so a worker can rebuild its
+local index without encoding anything or talking to Qdrant. Payloads are
+stored column-wise (one list per field) which keeps the block compact for
+the handful of fields every point shares.
+"""
+import json
+import logging
+import os
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"KBSNAP1\n"
+ALIGNMENT = 64
+FORMAT_VERSION = 1
+
+
+class SnapshotError(Exception):
+    """Snapshot file is missing, corrupt or built for a different model."""
+
+
+@dataclass
+class KnowledgeSnapshot:
+    model_name: str
+    dim: int
+    ids: List[str]
+    vectors: np.ndarray  # memmap, read-only
+    payloads: List[Dict[str, Any]]
+    created_ts: float
+    max_updated_ts: float  # newest point write; refreshes fetch anything after it
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _to_columns(payloads: Sequence[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    fields = sorted({key for payload in payloads for key in payload})
+    return {field: [payload.get(field) for payload in payloads] for field in fields}
+
+
+def _from_columns(columns: Dict[str, List[Any]], count: int) -> List[Dict[str, Any]]:
+    payloads: List[Dict[str, Any]] = [{} for _ in range(count)]
+    for field, values in columns.items():
+        for payload, value in zip(payloads, values):
+            if value is not None:
+                payload[field] = value
+    return payloads
+
+
+def max_updated_ts(payloads: Sequence[Dict[str, Any]]) -> float:
+    """Newest write time across payloads (``updated_ts``, else ``created_ts``)."""
+    return max(
+        (float(p.get("updated_ts") or p.get("created_ts") or 0.0) for p in payloads),
+        default=0.0,
+    )
+
+
+def write_snapshot(
+    path: str,
+    ids: Sequence[str],
+    vectors: np.ndarray,
+    payloads: Sequence[Dict[str, Any]],
+    model_name: str,
+    created_ts: float,
+) -> int:
+    """Atomically write a snapshot; returns the number of points written."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if len(ids) != len(payloads) or len(ids) != vectors.shape[0]:
+        raise ValueError("ids, vectors and payloads must have the same length")
+    dim = int(vectors.shape[1]) if vectors.ndim == 2 else 0
+
+    payload_block = json.dumps(
+        {"ids": list(ids), "columns": _to_columns(payloads)}, separators=(",", ":")
+    ).encode("utf-8")
+    header = {
+        "version": FORMAT_VERSION,
+        "model_name": model_name,
+        "dim": dim,
+        "count": len(ids),
+        "created_ts": created_ts,
+        "max_updated_ts": max_updated_ts(payloads),
+    }
+
+    # Offsets depend on the header length, so size the header with them filled in
+    prefix = len(MAGIC) + 8
+    header_bytes = b""
+    while True:
+        header_end = prefix + len(header_bytes)
+        header["vectors_offset"] = -(-header_end // ALIGNMENT) * ALIGNMENT
+        header["payload_offset"] = header["vectors_offset"] + vectors.nbytes
+        header["payload_length"] = len(payload_block)
+        encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        if encoded == header_bytes:
+            break
+        header_bytes = encoded
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (header["vectors_offset"] - f.tell()))
+        f.write(vectors.tobytes())
+        f.write(payload_block)
+    os.replace(tmp_path, path)
+
+    logger.info(f"Wrote knowledge snapshot with {len(ids)} points to {path}")
+    return len(ids)
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise SnapshotError(f"{path} is not a knowledge snapshot")
+            (length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(length).decode("utf-8"))
+    except (OSError, ValueError, struct.error) as e:
+        raise SnapshotError(f"Could not read snapshot {path}: {e}") from e
+
+    if header.get("version") != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {header.get('version')}")
+    return header
+
+
+def read_snapshot(
+    path: str, model_name: Optional[str] = None, dim: Optional[int] = None
+) -> KnowledgeSnapshot:
+    """
+    Open a snapshot, memory-mapping its vectors. Raises SnapshotError if it
+    was built with a different model or dimension than the caller expects.
+    """
+    header = read_header(path)
+    if model_name is not None and header["model_name"] != model_name:
+        raise SnapshotError(
+            f"Snapshot built with {header['model_name']}, expected {model_name}"
+        )
+    if dim is not None and header["count"] and header["dim"] != dim:
+        raise SnapshotError(f"Snapshot dimension {header['dim']}, expected {dim}")
+
+    count = header["count"]
+    try:
+        if count:
+            vectors = np.memmap(
+                path,
+                dtype=np.float32,
+                mode="r",
+                offset=header["vectors_offset"],
+                shape=(count, header["dim"]),
+            )
+        else:
+            vectors = np.zeros((0, header["dim"]), dtype=np.float32)
+
+        with open(path, "rb") as f:
+            f.seek(header["payload_offset"])
+            block = json.loads(f.read(header["payload_length"]).decode("utf-8"))
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"Could not read snapshot {path}: {e}") from e
+
+    if len(block["ids"]) != count:
+        raise SnapshotError(f"Snapshot {path} is truncated")
+
+    return KnowledgeSnapshot(
+        model_name=header["model_name"],
+        dim=header["dim"],
+        ids=block["ids"],
+        vectors=vectors,
+        payloads=_from_columns(block["columns"], count),
+        created_ts=header["created_ts"],
+        max_updated_ts=header["max_updated_ts"],
+    )
@@ -1,24 +1,55 @@
 import logging
-from typing import Any, Dict, cast
+from typing import Any, Dict, List, Optional, Sequence, Tuple, cast
 import uuid
-from dotenv import load_dotenv
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Disabled,
+    Distance,
+    FieldCondition,
+    Filter,
+    MatchAny,
+    MatchValue,
+    PayloadSchemaType,
+    Range,
+    PointIdsList,
+    PointStruct,
+    QuantizationSearchParams,
+    QueryRequest,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+    VectorParamsDiff,
+)
+import hashlib
 import os
 import json
+import threading
+import time
+from datetime import datetime
 from itertools import islice
 
-from app.config.settings import knowledge_settings
-from app.embeddings import get_encoder
-
-load_dotenv()
+from app.config.settings import knowledge_settings, qdrant_settings
+from app.embeddings import EmbeddingService, encoder_id, get_embedding_service, get_encoder
+from app.answer_cache import SemanticAnswerCache
+from app.embedding_cache import normalize_key
+from app.kb_snapshot import SnapshotError, max_updated_ts, read_snapshot, write_snapshot
+from app.lexical_index import LexicalIndex, tokenize
+from app.models.knowledge import CURATED_SOURCES, KnowledgeFilter, KnowledgeSource
+from app.qdrant_pool import get_async_qdrant_client, get_qdrant_client, qdrant_metrics
+from app.vector_index import LocalVectorIndex
 
 QDRANT_COLLECTION = knowledge_settings.collection_name
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
-QDRANT_URL = os.getenv("QDRANT_URL")
 
-# FIX: control syncing from env (VERY IMPORTANT)
-SYNC_KB = os.getenv("SYNC_KB", "false").lower() == "true"
+# FAQ sync is incremental (content-hashed ids), so it is cheap to run on every start
+SYNC_KB = os.getenv("SYNC_KB", "true").lower() == "true"
+
+# FAQ points were tagged source="local" before KnowledgeSource existed
+LEGACY_FAQ_SOURCE = "local"
 
 
 logging.basicConfig(
@@ -35,39 +66,307 @@ def batch(iterable, size=50):
         yield chunk
 
 
+KEYWORD_INDEX_FIELDS = ("category", "source", "type")
+FLOAT_INDEX_FIELDS = ("created_ts", "updated_ts")
+
+PRICE_TERMS = {"much", "cost", "costs", "price", "prices", "pricing", "charge", "fee", "rate", "offer"}
+
+
+def faq_content_hash(question: str, answer: str) -> str:
+    return hashlib.sha256(f"{question.strip()}\n{answer.strip()}".encode("utf-8")).hexdigest()
+
+
+def faq_point_id(question: str, answer: str) -> str:
+    """Deterministic point id for a FAQ, so re-syncing the same content is a no-op."""
+    return str(uuid.uuid5(uuid.NAMESPACE_OID, faq_content_hash(question, answer)))
+
+
 class KnowledgeManager:
-    def __init__(self):
+    def __init__(
+        self,
+        qdrant: Optional[QdrantClient] = None,
+        encoder=None,
+        faq: Optional[List[Dict[str, Any]]] = None,
+        embedder: Optional[EmbeddingService] = None,
+        services: Optional[Dict[str, Any]] = None,
+        aqdrant: Optional[AsyncQdrantClient] = None,
+    ):
         self.collection_name = QDRANT_COLLECTION
 
-        with open("app/json/info.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
+        if faq is None or services is None:
+            with open("app/json/info.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if faq is None:
+                faq = data.get("faqs") if isinstance(data, dict) else data
+            if services is None:
+                services = data.get("services", {}) if isinstance(data, dict) else {}
+
+        self.faq = faq
+        self.services = services
 
-        self.faq = data.get("faqs") if isinstance(data, dict) else data
+        # Request-path calls go through the async client so Qdrant round trips
+        # never block the event loop; the sync client is for startup and scripts.
+        self.qdrant = qdrant or get_qdrant_client()
+        self.aqdrant = aqdrant or get_async_qdrant_client()
 
-        self.qdrant = QdrantClient(
-            url=QDRANT_URL,
-            api_key=QDRANT_API_KEY,
-            timeout=60,  # FIX: increased timeout
+        self.encoder = encoder or get_encoder()
+        self.embedder = embedder or get_embedding_service()
+        # Guards the in-process indexes: the snapshot refresh thread writes
+        # them while the event loop searches. Full reloads are built aside
+        # and swapped in under the lock.
+        self._index_lock = threading.RLock()
+        self.local_index = LocalVectorIndex()
+        self.local_index_max_points = knowledge_settings.local_index_max_points
+
+        self.lexical_index = self._build_lexical_index()
+        self.retrieval_stats = {
+            path: {"count": 0, "total_ms": 0.0} for path in ("lexical", "cached", "hybrid")
+        }
+
+        self.answer_cache = SemanticAnswerCache(
+            radius=knowledge_settings.answer_cache_radius,
+            ttl_seconds=knowledge_settings.answer_cache_ttl_seconds,
+            max_items=knowledge_settings.answer_cache_max_items,
         )
 
-        self.encoder = get_encoder()
+        self.snapshot_path = knowledge_settings.snapshot_path
+        # Newest write already mirrored locally; refreshes fetch points after it
+        self._synced_ts = 0.0
+        self._refresh_stop = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    def _build_lexical_index(
+        self, ids: Sequence[str] = (), payloads: Sequence[Dict[str, Any]] = ()
+    ) -> LexicalIndex:
+        """A lexical index of the FAQs from info.json plus the given points."""
+        index = LexicalIndex()
+        for faq in self._valid_faqs():
+            payload = {**faq, "category": "faq", "source": KnowledgeSource.FAQ.value}
+            index.upsert(faq_point_id(faq["question"], faq["answer"]), payload)
+        for point_id, payload in zip(ids, payloads):
+            index.upsert(point_id, payload)
+        return index
+
+    def _swap_indexes(self, local_index: LocalVectorIndex, lexical_index: LexicalIndex):
+        with self._index_lock:
+            self.local_index = local_index
+            self.lexical_index = lexical_index
+            self.answer_cache.clear()
 
     def initialize(self):
-        """Initialize Qdrant collection and optionally sync FAQs."""
+        """
+        Initialize Qdrant collection, optionally sync FAQs and mirror the
+        collection locally.
+
+        If a snapshot for the current encoder exists, the local index is
+        loaded from it and the Qdrant work moves to a background thread, so
+        the worker can answer before touching the network. Either way the
+        thread then keeps the local index in step with writes made by other
+        processes.
+        """
+        from_snapshot = self.load_snapshot()
+        if not from_snapshot:
+            self._prepare_collection()
+            if self.load_local_index():
+                self.save_snapshot()
+        if not from_snapshot and knowledge_settings.snapshot_refresh_seconds <= 0:
+            return
+
+        self._refresh_thread = threading.Thread(
+            target=self._background_refresh,
+            args=(from_snapshot,),
+            name="kb-snapshot-refresh",
+            daemon=True,
+        )
+        self._refresh_thread.start()
+
+    def _prepare_collection(self):
         self._init_collection()
 
-        # FIX: do NOT sync by default
         if SYNC_KB:
             self._sync_faqs()
         else:
             logger.info("Skipping FAQ sync (SYNC_KB=false)")
 
-    def _init_collection(self):
-        """Create collection if it doesn't exist."""
+    def load_local_index(self) -> bool:
+        """Mirror the collection in memory if it is small enough to search locally."""
         try:
-            self.qdrant.get_collection(self.collection_name)
+            count = self.qdrant.count(self.collection_name, exact=True).count
+            if count > self.local_index_max_points:
+                logger.info(f"Collection has {count} points, searching Qdrant directly")
+                self.local_index.loaded = False
+                return False
+
+            local_index = LocalVectorIndex()
+            local_index.load_from_qdrant(self.qdrant, self.collection_name)
+            lexical_index = self._build_lexical_index(local_index.ids, local_index.payloads)
+            self._swap_indexes(local_index, lexical_index)
+            self._synced_ts = max_updated_ts(local_index.payloads)
+            return True
+        except Exception as e:
+            logger.error(f"Could not load local index: {e}")
+            self.local_index.loaded = False
+            return False
+
+    def _encoder_dim(self) -> Optional[int]:
+        get_dim = getattr(self.encoder, "get_sentence_embedding_dimension", None)
+        return get_dim() if callable(get_dim) else None
+
+    def load_snapshot(self, path: Optional[str] = None) -> bool:
+        """Fill the local and lexical indexes from a snapshot file (no encoding, no network)."""
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            snapshot = read_snapshot(path, model_name=encoder_id(), dim=self._encoder_dim())
+        except SnapshotError as e:
+            logger.warning(f"Ignoring knowledge snapshot: {e}")
+            return False
+
+        local_index = LocalVectorIndex()
+        local_index.upsert_many(snapshot.ids, snapshot.vectors, snapshot.payloads)
+        local_index.loaded = True
+        self._swap_indexes(local_index, self._build_lexical_index(snapshot.ids, snapshot.payloads))
+        self._synced_ts = snapshot.max_updated_ts
+
+        logger.info(f"Loaded {len(snapshot)} points into local index from snapshot {path}")
+        return True
+
+    def save_snapshot(self, path: Optional[str] = None) -> int:
+        """Write the local index to a snapshot file; returns the number of points."""
+        path = path or self.snapshot_path
+        if not path or not self.local_index.loaded:
+            return 0
+        with self._index_lock:
+            ids = list(self.local_index.ids)
+            vectors = self.local_index.matrix.copy()
+            payloads = list(self.local_index.payloads)
+        try:
+            return write_snapshot(
+                path,
+                ids,
+                vectors,
+                payloads,
+                model_name=encoder_id(),
+                created_ts=time.time(),
+            )
+        except OSError as e:
+            logger.error(f"Could not write knowledge snapshot: {e}")
+            return 0
+
+    def refresh_local_index(self) -> Dict[str, int]:
+        """
+        Pull points created since the last sync into the local index. Falls
+        back to a full reload when counts disagree (points were deleted).
+        """
+        if not self.local_index.loaded:
+            return {"added": 0, "reloaded": 0}
+
+        added = 0
+        offset = None
+        # Points written before updated_ts existed only carry created_ts
+        since = Filter(
+            should=[
+                FieldCondition(key="updated_ts", range=Range(gt=self._synced_ts)),
+                FieldCondition(key="created_ts", range=Range(gt=self._synced_ts)),
+            ]
+        )
+        while True:
+            with qdrant_metrics.track("scroll"):
+                points, offset = self.qdrant.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=since,
+                    limit=256,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True,
+                )
+            with self._index_lock:
+                for point in points:
+                    self.on_knowledge_changed(str(point.id), point.vector, point.payload or {})  # type: ignore[arg-type]
+            added += len(points)
+            if offset is None:
+                break
+
+        with self._index_lock:
+            self._synced_ts = max(self._synced_ts, max_updated_ts(self.local_index.payloads))
+            local_count = len(self.local_index)
+
+        count = self.qdrant.count(self.collection_name, exact=True).count
+        if count != local_count:
+            # The current indexes keep serving until the rebuilt ones are swapped in
+            logger.info(f"Local index has {local_count} points, Qdrant {count}; reloading")
+            self.load_local_index()
+            return {"added": added, "reloaded": 1}
+
+        return {"added": added, "reloaded": 0}
+
+    def _background_refresh(self, from_snapshot: bool = True):
+        """
+        Catch up with Qdrant after a snapshot boot, then periodically pull
+        points written by other processes and keep the snapshot fresh.
+        """
+        if from_snapshot:
+            try:
+                self._prepare_collection()
+            except Exception as e:
+                logger.error(f"Background collection sync failed: {e}")
+        elif self._refresh_stop.wait(knowledge_settings.snapshot_refresh_seconds):
+            return
+
+        interval = knowledge_settings.snapshot_refresh_seconds
+        first = from_snapshot
+        while True:
+            try:
+                summary = self.refresh_local_index()
+                logger.info(f"Knowledge snapshot refresh {summary}")
+                # The first pass also persists whatever the FAQ sync changed
+                if first or summary["added"] or summary["reloaded"]:
+                    self.save_snapshot()
+                first = False
+            except Exception as e:
+                logger.error(f"Knowledge snapshot refresh failed: {e}")
+
+            if interval <= 0 or self._refresh_stop.wait(interval):
+                return
+
+    def _use_local_index(self) -> bool:
+        return self.local_index.loaded and len(self.local_index) <= self.local_index_max_points
+
+    def _quantization_config(self):
+        """Quantization config for the collection, from KnowledgeSettings."""
+        mode = knowledge_settings.quantization
+        if mode == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True,
+                )
+            )
+        if mode == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        if mode == "none":
+            return None
+        raise ValueError(f"Unknown quantization mode: {mode}")
+
+    def search_params(self) -> Optional[SearchParams]:
+        """Search quantized vectors, then rescore the top candidates on the originals."""
+        if knowledge_settings.quantization == "none":
+            return None
+        return SearchParams(
+            quantization=QuantizationSearchParams(
+                rescore=knowledge_settings.quantization_rescore,
+                oversampling=knowledge_settings.quantization_oversampling,
+            )
+        )
+
+    def _init_collection(self):
+        """Create the collection if it doesn't exist, otherwise migrate it in place."""
+        if self.qdrant.collection_exists(self.collection_name):
             logger.info("Collection already exists")
-        except Exception:
+            self._migrate_collection()
+        else:
             embedding_size = self.encoder.get_sentence_embedding_dimension()
             if not embedding_size:
                 raise ValueError("Could not determine embedding dimension")
@@ -77,19 +376,64 @@ class KnowledgeManager:
                 vectors_config=VectorParams(
                     size=embedding_size,
                     distance=Distance.COSINE,
+                    on_disk=knowledge_settings.vectors_on_disk,
                 ),
+                quantization_config=self._quantization_config(),
             )
             logger.info(f"Created collection '{self.collection_name}'")
 
-    def _sync_faqs(self):
-        """Sync FAQs to Qdrant (BATCHED)."""
+        self._ensure_payload_indexes()
 
+    def _migrate_collection(self):
+        """Bring an existing collection's vector storage and quantization in line with settings."""
+        info = self.qdrant.get_collection(self.collection_name)
+        vectors = info.config.params.vectors
+        current_on_disk = bool(getattr(vectors, "on_disk", False))
+        current_quantization = info.config.quantization_config
+        wanted_quantization = self._quantization_config()
+
+        update: Dict[str, Any] = {}
+        if current_on_disk != knowledge_settings.vectors_on_disk:
+            update["vectors_config"] = {
+                "": VectorParamsDiff(on_disk=knowledge_settings.vectors_on_disk)
+            }
+        if current_quantization != wanted_quantization:
+            update["quantization_config"] = wanted_quantization or Disabled.DISABLED
+
+        if update:
+            self.qdrant.update_collection(
+                collection_name=self.collection_name,
+                timeout=qdrant_settings.bulk_timeout,
+                **update,
+            )
+            logger.info(f"Migrated collection '{self.collection_name}': {sorted(update)}")
+
+    def _ensure_payload_indexes(self):
+        """Create keyword indexes on the payload fields searches filter by."""
+        existing = self.qdrant.get_collection(self.collection_name).payload_schema or {}
+        for field in KEYWORD_INDEX_FIELDS:
+            if field not in existing:
+                self.qdrant.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field,
+                    field_schema=PayloadSchemaType.KEYWORD,
+                )
+                logger.info(f"Created payload index on '{field}'")
+        for field in FLOAT_INDEX_FIELDS:
+            if field not in existing:
+                self.qdrant.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field,
+                    field_schema=PayloadSchemaType.FLOAT,
+                )
+                logger.info(f"Created payload index on '{field}'")
+
+    def _valid_faqs(self) -> List[Dict[str, str]]:
         if not isinstance(self.faq, list):
             logger.error(f"FAQ is not a list! Type: {type(self.faq)}")
-            return
-
-        points = []
+            return []
 
+        faqs = []
         for idx, faq in enumerate(self.faq):
             if not isinstance(faq, dict):
                 logger.warning(f"Invalid FAQ at index {idx}")
@@ -102,74 +446,752 @@ class KnowledgeManager:
                 logger.warning(f"Missing data in FAQ {idx}")
                 continue
 
-            vector = self.encoder.encode(question).tolist()
+            faqs.append({"question": question, "answer": answer})
+        return faqs
+
+    def _existing_faq_sources(self) -> Dict[str, Any]:
+        """
+        Map of every FAQ point id in the collection to its payload ``source``.
 
-            points.append(
+        Selected by source, not category: learned answers may be filed under
+        category "faq" and must survive the sync.
+        """
+        sources: Dict[str, Any] = {}
+        offset = None
+        faq_sources = [KnowledgeSource.FAQ.value, LEGACY_FAQ_SOURCE]
+        while True:
+            points, offset = self.qdrant.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=Filter(
+                    must=[FieldCondition(key="source", match=MatchAny(any=faq_sources))]
+                ),
+                limit=256,
+                offset=offset,
+                with_payload=["source"],
+                with_vectors=False,
+            )
+            for point in points:
+                sources[str(point.id)] = (point.payload or {}).get("source")
+            if offset is None:
+                return sources
+
+    def _sync_faqs(self) -> Dict[str, int]:
+        """
+        Incrementally sync FAQs to Qdrant.
+
+        Point ids are derived from a hash of question+answer, so unchanged
+        FAQs are skipped, new or edited ones are encoded in a single batch,
+        and points whose FAQ was removed or edited are deleted.
+        """
+        desired = {faq_point_id(f["question"], f["answer"]): f for f in self._valid_faqs()}
+        existing = self._existing_faq_sources()
+
+        # Points written before FAQs were tagged source=faq are re-upserted
+        new_ids = [
+            point_id for point_id in desired
+            if existing.get(point_id) != KnowledgeSource.FAQ.value
+        ]
+        stale_ids = [point_id for point_id in existing if point_id not in desired]
+
+        if new_ids:
+            questions = [desired[point_id]["question"] for point_id in new_ids]
+            vectors = self.embedder.encode(questions)
+            # Stamped so refresh_local_index() in other workers picks up FAQ edits
+            now = datetime.now()
+
+            points = [
                 PointStruct(
-                    id=str(uuid.uuid4()),
+                    id=point_id,
                     vector=vector,
                     payload={
-                        "question": question,
-                        "answer": answer,
+                        "question": desired[point_id]["question"],
+                        "answer": desired[point_id]["answer"],
                         "category": "faq",
-                        "source": "local",
+                        "source": KnowledgeSource.FAQ.value,
+                        "content_hash": faq_content_hash(
+                            desired[point_id]["question"], desired[point_id]["answer"]
+                        ),
+                        "created_at": now.isoformat(),
+                        "created_ts": now.timestamp(),
+                        "updated_at": now.isoformat(),
+                        "updated_ts": now.timestamp(),
                     },
                 )
-            )
+                for point_id, vector in zip(new_ids, vectors)
+            ]
 
-        if not points:
-            logger.warning("No valid FAQs to sync")
-            return
+            # FIX: batch upserts to avoid timeouts
+            for i, chunk in enumerate(batch(points, size=50), start=1):
+                with qdrant_metrics.track("upsert"):
+                    self.qdrant.upsert(
+                        collection_name=self.collection_name,
+                        points=chunk,
+                        timeout=qdrant_settings.bulk_timeout,
+                    )
+                logger.info(f"Upserted batch {i} ({len(chunk)} points)")
 
-        # FIX: batch upserts to avoid timeouts
-        for i, chunk in enumerate(batch(points, size=50), start=1):
-            self.qdrant.upsert(
+            with self._index_lock:
+                if self.local_index.loaded:
+                    self.local_index.upsert_many(
+                        [p.id for p in points], vectors, [p.payload for p in points]
+                    )
+                for point in points:
+                    self.lexical_index.upsert(str(point.id), point.payload)
+
+        if stale_ids:
+            self.qdrant.delete(
                 collection_name=self.collection_name,
-                points=chunk,
+                points_selector=PointIdsList(points=stale_ids),
             )
-            logger.info(f"Upserted batch {i} ({len(chunk)} points)")
+            with self._index_lock:
+                if self.local_index.loaded:
+                    self.local_index.delete(stale_ids)
+                for point_id in stale_ids:
+                    self.lexical_index.remove(point_id)
 
-        logger.info(f"FAQ sync complete ({len(points)} total)")
+        if new_ids or stale_ids:
+            with self._index_lock:
+                self.answer_cache.clear()
 
-    def search(self, query: str, threshold: float = 0.7, top_k: int = 3):
-        query_vector = self.encoder.encode(query).tolist()
+        summary = {
+            "added": len(new_ids),
+            "removed": len(stale_ids),
+            "unchanged": len(desired) - len(new_ids),
+        }
+        logger.info(f"FAQ sync complete {summary}")
+        return summary
 
-        results = self.qdrant.query_points(
-            collection_name=self.collection_name,
-            query=query_vector,
-            limit=top_k,
-        )
+    def _record_retrieval(self, path: str, started: float):
+        stats = self.retrieval_stats[path]
+        stats["count"] += 1
+        stats["total_ms"] += (time.perf_counter() - started) * 1000
+
+    def _lexical_shortcut(
+        self, query: str, knowledge_filter: Optional[KnowledgeFilter] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Answer without an embedding when the query is (near-)verbatim an
+        indexed question: an exact normalized match, or a BM25 winner whose
+        question covers the query terms and clearly beats the runner-up.
+        """
+        knowledge_filter = knowledge_filter or KnowledgeFilter()
+
+        if knowledge_filter.is_empty():
+            service_answer = self._service_price_answer(query)
+            if service_answer:
+                return service_answer
+
+        with self._index_lock:
+            return self._lexical_match(query, knowledge_filter)
+
+    def _direct_answer(self, query: str) -> Optional[Dict[str, Any]]:
+        """The unfiltered service-price and exact-question shortcuts."""
+        service_answer = self._service_price_answer(query)
+        if service_answer:
+            return service_answer
+        with self._index_lock:
+            exact = self.lexical_index.lookup_exact(query)
+        return self._exact_result(exact[1]) if exact else None
+
+    @staticmethod
+    def _exact_result(payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "answer": payload.get("answer"),
+            "question": payload.get("question"),
+            "score": 1.0,
+            "retrieval": "exact",
+        }
+
+    def _lexical_match(self, query: str, knowledge_filter: KnowledgeFilter) -> Optional[Dict[str, Any]]:
+        exact = self.lexical_index.lookup_exact(query)
+        if exact and knowledge_filter.matches(exact[1]):
+            return self._exact_result(exact[1])
+
+        if knowledge_filter.is_empty():
+            hits = self.lexical_index.search(query, top_k=2)
+        else:
+            hits = [
+                hit for hit in self.lexical_index.search(query, top_k=len(self.lexical_index))
+                if knowledge_filter.matches(hit[2])
+            ][:2]
+        if not hits:
+            return None
 
-        if results.points and results.points[0].score >= threshold:
-            payload = cast(Dict[str, Any], results.points[0].payload or {})
+        top_score, doc_id, payload = hits[0]
+        runner_up = hits[1][0] if len(hits) > 1 else 0.0
+        coverage = self.lexical_index.question_coverage(query, doc_id)
+
+        if (
+            coverage >= knowledge_settings.lexical_min_coverage
+            and top_score >= knowledge_settings.lexical_margin * runner_up
+        ):
             return {
                 "answer": payload.get("answer"),
                 "question": payload.get("question"),
-                "score": results.points[0].score,
+                "score": coverage,
+                "retrieval": "lexical",
             }
+        return None
+
+    def _service_price_answer(self, query: str) -> Optional[Dict[str, Any]]:
+        """Answer price/offer questions that name a service from info.json."""
+        terms = set(tokenize(query))
+        if not terms & PRICE_TERMS:
+            return None
 
+        normalized = f" {normalize_key(query)} "
+        for service, price in (self.services or {}).items():
+            if f" {normalize_key(service)} " in normalized:
+                return {
+                    "answer": f"Our {service} service costs ₹{price}.",
+                    "question": f"How much does {service} cost?",
+                    "score": 1.0,
+                    "retrieval": "service",
+                }
         return None
 
-    def add_knowledge(self, question: str, answer: str, category: str = "general"):
-        vector = self.encoder.encode(question).tolist()
+    @staticmethod
+    def _to_hits(points) -> List[Tuple[float, str, Dict[str, Any]]]:
+        return [
+            (point.score, str(point.id), cast(Dict[str, Any], point.payload or {}))
+            for point in points
+        ]
 
-        self.qdrant.upsert(
-            collection_name=self.collection_name,
-            points=[
-                PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=vector,
-                    payload={
-                        "question": question,
-                        "answer": answer,
-                        "category": category,
-                        "source": "user_added",
-                    },
+    async def _vector_hits(
+        self,
+        query_vector: List[float],
+        top_k: int,
+        knowledge_filter: Optional[KnowledgeFilter] = None,
+    ):
+        hits = await self._vector_hits_many([query_vector], top_k, knowledge_filter)
+        return hits[0]
+
+    async def _vector_hits_many(
+        self,
+        query_vectors: List[List[float]],
+        top_k: int,
+        knowledge_filter: Optional[KnowledgeFilter] = None,
+        score_threshold: Optional[float] = None,
+    ) -> List[List[Tuple[float, str, Dict[str, Any]]]]:
+        """Top-k hits for several query vectors in one local pass or one Qdrant batch request."""
+        if not query_vectors:
+            return []
+
+        knowledge_filter = knowledge_filter or KnowledgeFilter()
+        with self._index_lock:
+            if self._use_local_index():
+                predicate = None if knowledge_filter.is_empty() else knowledge_filter.matches
+                return [
+                    [
+                        hit for hit in self.local_index.search(vector, top_k, predicate)
+                        if score_threshold is None or hit[0] >= score_threshold
+                    ]
+                    for vector in query_vectors
+                ]
+
+        query_filter = knowledge_filter.to_qdrant()
+        requests = [
+            QueryRequest(
+                query=vector,
+                filter=query_filter,
+                params=self.search_params(),
+                limit=top_k,
+                score_threshold=score_threshold,
+                with_payload=True,
+            )
+            for vector in query_vectors
+        ]
+        with qdrant_metrics.track("search"):
+            responses = await self.aqdrant.query_batch_points(
+                collection_name=self.collection_name,
+                requests=requests,
+                timeout=qdrant_settings.search_timeout,
+            )
+        return [self._to_hits(response.points) for response in responses]
+
+    def _vector_hits_sync(
+        self,
+        query_vector: List[float],
+        top_k: int,
+        knowledge_filter: Optional[KnowledgeFilter] = None,
+    ):
+        knowledge_filter = knowledge_filter or KnowledgeFilter()
+        with self._index_lock:
+            if self._use_local_index():
+                predicate = None if knowledge_filter.is_empty() else knowledge_filter.matches
+                return self.local_index.search(query_vector, top_k, predicate)
+
+        with qdrant_metrics.track("search"):
+            results = self.qdrant.query_points(
+                collection_name=self.collection_name,
+                query=query_vector,
+                query_filter=knowledge_filter.to_qdrant(),
+                limit=top_k,
+                search_params=self.search_params(),
+                timeout=qdrant_settings.search_timeout,
+            )
+        return self._to_hits(results.points)
+
+    def _fuse(self, query: str, hits, threshold: float) -> Optional[Dict[str, Any]]:
+        """
+        Re-rank vector hits with a normalized BM25 bonus; the winner must
+        still clear the cosine threshold on its own.
+        """
+        if not hits:
+            return None
+
+        with self._index_lock:
+            lexical = {
+                doc_id: score
+                for score, doc_id, _ in self.lexical_index.search(query, top_k=len(self.lexical_index))
+            }
+        top_lexical = max(lexical.values(), default=0.0) or 1.0
+        weight = knowledge_settings.fusion_lexical_weight
+
+        score, _, payload = max(
+            hits, key=lambda hit: hit[0] + weight * lexical.get(hit[1], 0.0) / top_lexical
+        )
+        if score < threshold:
+            return None
+
+        return {
+            "answer": payload.get("answer"),
+            "question": payload.get("question"),
+            "score": score,
+            "retrieval": "hybrid",
+        }
+
+    async def search(
+        self,
+        query: str,
+        threshold: float = 0.7,
+        top_k: int = 3,
+        knowledge_filter: Optional[KnowledgeFilter] = None,
+    ):
+        results = await self.search_many([query], threshold, top_k, knowledge_filter)
+        return results[0]
+
+    async def search_many(
+        self,
+        queries: List[str],
+        threshold: float = 0.7,
+        top_k: int = 3,
+        knowledge_filter: Optional[KnowledgeFilter] = None,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Answer several questions at once: lexical short-circuits first, then
+        one batched encode and one batched vector search for the rest.
+        """
+        started = time.perf_counter()
+        results, paths = await self._search_many(queries, threshold, top_k, knowledge_filter)
+        for path in paths:
+            self._record_retrieval(path, started)
+        return results
+
+    async def _search_many(
+        self,
+        queries: List[str],
+        threshold: float,
+        top_k: int,
+        knowledge_filter: Optional[KnowledgeFilter],
+    ) -> Tuple[List[Optional[Dict[str, Any]]], List[str]]:
+        """search_many() without recording stats; also returns each query's retrieval path."""
+        knowledge_filter = knowledge_filter or KnowledgeFilter()
+        scope = knowledge_filter.key()
+
+        results = [self._lexical_shortcut(query, knowledge_filter) for query in queries]
+        paths = ["lexical" if result else "hybrid" for result in results]
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        vectors = await self.embedder.embed_many([queries[i] for i in pending])
+
+        to_search = []
+        for i, vector in zip(pending, vectors):
+            with self._index_lock:
+                cached = self.answer_cache.get(vector, scope)
+            if cached and cached["score"] >= threshold:
+                results[i] = cached
+                paths[i] = "cached"
+            else:
+                to_search.append((i, vector))
+
+        hits = await self._vector_hits_many([vector for _, vector in to_search], top_k, knowledge_filter)
+        for (i, vector), question_hits in zip(to_search, hits):
+            result = self._fuse(queries[i], question_hits, threshold)
+            if result:
+                with self._index_lock:
+                    self.answer_cache.put(vector, result, scope)
+            results[i] = result
+
+        return results, paths
+
+    async def search_narrow_first(self, query: str, threshold: float = 0.7, top_k: int = 3):
+        """
+        Search curated answers (FAQs and supervisor resolutions) first and
+        widen to the whole collection only on a miss.
+        """
+        results = await self.search_many_narrow_first([query], threshold, top_k)
+        return results[0]
+
+    async def search_many_narrow_first(
+        self, queries: List[str], threshold: float = 0.7, top_k: int = 3
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        search_narrow_first() for several questions, batched at each step.
+        Service prices and exact question matches answer before either pass.
+        """
+        started = time.perf_counter()
+        results = [self._direct_answer(query) for query in queries]
+        paths = ["lexical" if result else "hybrid" for result in results]
+
+        misses = [i for i, result in enumerate(results) if result is None]
+        narrow_filter = KnowledgeFilter(source=CURATED_SOURCES)
+        for knowledge_filter in (narrow_filter, None):
+            if not misses:
+                break
+            found, found_paths = await self._search_many(
+                [queries[i] for i in misses], threshold, top_k, knowledge_filter
+            )
+            for i, result, path in zip(misses, found, found_paths):
+                results[i] = result
+                paths[i] = path
+            misses = [i for i in misses if results[i] is None]
+
+        for path in paths:
+            self._record_retrieval(path, started)
+        return results
+
+    async def search_filtered(
+        self,
+        query: str,
+        knowledge_filter: Optional[KnowledgeFilter] = None,
+        top_k: int = 5,
+        score_threshold: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Top-k vector matches with scores, restricted by a payload filter."""
+        results = await self.search_filtered_many([query], knowledge_filter, top_k, score_threshold)
+        return results[0]
+
+    async def search_filtered_many(
+        self,
+        queries: List[str],
+        knowledge_filter: Optional[KnowledgeFilter] = None,
+        top_k: int = 5,
+        score_threshold: Optional[float] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """search_filtered() for several queries with one encode and one batch query."""
+        vectors = await self.embedder.embed_many(queries)
+        hits = await self._vector_hits_many(vectors, top_k, knowledge_filter, score_threshold)
+        return [
+            [
+                {
+                    "id": point_id,
+                    "question": payload.get("question"),
+                    "answer": payload.get("answer"),
+                    "category": payload.get("category"),
+                    "source": payload.get("source"),
+                    "request_id": payload.get("request_id"),
+                    "score": score,
+                }
+                for score, point_id, payload in query_hits
+            ]
+            for query_hits in hits
+        ]
+
+    def search_sync(
+        self,
+        query: str,
+        threshold: float = 0.7,
+        top_k: int = 3,
+        knowledge_filter: Optional[KnowledgeFilter] = None,
+    ):
+        """Blocking variant of search() for scripts; not for use on the event loop."""
+        shortcut = self._lexical_shortcut(query, knowledge_filter)
+        if shortcut:
+            return shortcut
+
+        query_vector = self.embedder.encode([query])[0]
+        hits = self._vector_hits_sync(query_vector, top_k, knowledge_filter)
+        return self._fuse(query, hits, threshold)
+
+    def stats(self) -> Dict[str, Any]:
+        """Lookup counts and mean latency per retrieval path, plus answer cache stats."""
+        stats = {
+            path: {
+                "count": path_stats["count"],
+                "avg_ms": path_stats["total_ms"] / path_stats["count"] if path_stats["count"] else 0.0,
+            }
+            for path, path_stats in self.retrieval_stats.items()
+        }
+        stats["answer_cache"] = self.answer_cache.stats()
+        return stats
+
+    async def evaluate_retrieval(self, labelled, threshold: float = 0.7) -> Dict[str, Any]:
+        """
+        Measure recall@1 and latency of the lexical short-circuit and of the
+        full hybrid search over ``(query, expected_question)`` pairs.
+        """
+        report = {}
+        for path in ("lexical", "hybrid"):
+            correct = answered = 0
+            started = time.perf_counter()
+            for query, expected in labelled:
+                if path == "lexical":
+                    result = self._lexical_shortcut(query)
+                else:
+                    query_vector = await self.embedder.embed(query)
+                    result = self._fuse(query, await self._vector_hits(query_vector, 3), threshold)
+                if result:
+                    answered += 1
+                    correct += result["question"] == expected
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            report[path] = {
+                "queries": len(labelled),
+                "answered": answered,
+                "recall": correct / len(labelled) if labelled else 0.0,
+                "avg_ms": elapsed_ms / len(labelled) if labelled else 0.0,
+            }
+        return report
+
+    @staticmethod
+    def _knowledge_point(
+        question: str,
+        answer: str,
+        category: str,
+        vector: List[float],
+        source: KnowledgeSource = KnowledgeSource.USER_ADDED,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> PointStruct:
+        now = datetime.now()
+        return PointStruct(
+            id=str(uuid.uuid4()),
+            vector=vector,
+            payload={
+                "question": question,
+                "answer": answer,
+                "category": category,
+                "source": source.value,
+                **(extra or {}),
+                "version": 1,
+                "created_at": now.isoformat(),
+                "created_ts": now.timestamp(),
+                "updated_at": now.isoformat(),
+                "updated_ts": now.timestamp(),
+            },
+        )
+
+    @staticmethod
+    def _dedup_filter() -> KnowledgeFilter:
+        # FAQ points are owned by info.json and would be restored by the next sync
+        return KnowledgeFilter(
+            source=[KnowledgeSource.USER_ADDED.value, KnowledgeSource.SUPERVISOR_RESOLVED.value]
+        )
+
+    @staticmethod
+    def _merge_into(point: PointStruct, hits) -> bool:
+        """
+        Point ``point`` at the existing near-duplicate in ``hits`` (if any),
+        keeping its creation time and bumping its version. Returns True if merged.
+        """
+        if not hits:
+            return False
+
+        _, existing_id, existing = hits[0]
+        payload = point.payload or {}
+        point.id = existing_id
+        point.payload = {
+            **payload,
+            "version": int(existing.get("version") or 1) + 1,
+            "created_at": existing.get("created_at", payload["created_at"]),
+            "created_ts": existing.get("created_ts", payload["created_ts"]),
+        }
+        return True
+
+    async def add_knowledge(
+        self,
+        question: str,
+        answer: str,
+        category: str = "general",
+        source: KnowledgeSource = KnowledgeSource.USER_ADDED,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Store a question/answer pair, updating the existing point in place
+        when one is within ``dedup_similarity``. Returns the point id.
+        """
+        vector = await self.embedder.embed(question)
+        point = self._knowledge_point(question, answer, category, vector, source, extra)
+
+        hits = await self._vector_hits_many(
+            [vector], 1, self._dedup_filter(), knowledge_settings.dedup_similarity
+        )
+        merged = self._merge_into(point, hits[0])
+
+        with qdrant_metrics.track("upsert"):
+            await self.aqdrant.upsert(
+                collection_name=self.collection_name,
+                points=[point],
+                timeout=qdrant_settings.bulk_timeout,
+            )
+        self.on_knowledge_changed(str(point.id), vector, point.payload or {})
+
+        action = "Updated" if merged else "Added"
+        logger.info(f"{action} knowledge: {question[:40]}...")
+        return str(point.id)
+
+    def add_knowledge_sync(
+        self,
+        question: str,
+        answer: str,
+        category: str = "general",
+        source: KnowledgeSource = KnowledgeSource.USER_ADDED,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Blocking variant of add_knowledge() for scripts."""
+        vector = self.embedder.encode([question])[0]
+        point = self._knowledge_point(question, answer, category, vector, source, extra)
+
+        hits = [
+            hit for hit in self._vector_hits_sync(vector, 1, self._dedup_filter())
+            if hit[0] >= knowledge_settings.dedup_similarity
+        ]
+        merged = self._merge_into(point, hits)
+
+        with qdrant_metrics.track("upsert"):
+            self.qdrant.upsert(
+                collection_name=self.collection_name,
+                points=[point],
+                timeout=qdrant_settings.bulk_timeout,
+            )
+        self.on_knowledge_changed(str(point.id), vector, point.payload or {})
+
+        action = "Updated" if merged else "Added"
+        logger.info(f"{action} knowledge: {question[:40]}...")
+        return str(point.id)
+
+    def compact_duplicates(
+        self, similarity: Optional[float] = None, dry_run: bool = False
+    ) -> Dict[str, int]:
+        """
+        Collapse existing near-duplicate learned answers. Within each group
+        the most recently written point is kept (so the latest answer wins),
+        its version absorbs the others, and the rest are deleted.
+        """
+        similarity = similarity or knowledge_settings.dedup_similarity
+        learned = self._dedup_filter().to_qdrant()
+
+        ids: List[str] = []
+        vectors: List[List[float]] = []
+        payloads: List[Dict[str, Any]] = []
+        offset = None
+        while True:
+            with qdrant_metrics.track("scroll"):
+                points, offset = self.qdrant.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=learned,
+                    limit=256,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True,
                 )
-            ],
+            for point in points:
+                ids.append(str(point.id))
+                vectors.append(point.vector)  # type: ignore[arg-type]
+                payloads.append(point.payload or {})
+            if offset is None:
+                break
+
+        if not ids:
+            return {"scanned": 0, "groups": 0, "removed": 0}
+
+        matrix = LocalVectorIndex._normalize(np.asarray(vectors, dtype=np.float32))
+        order = sorted(
+            range(len(ids)),
+            key=lambda i: float(payloads[i].get("updated_ts") or payloads[i].get("created_ts") or 0.0),
+            reverse=True,
         )
 
-        logger.info(f"Added knowledge: {question[:40]}...")
+        merged = np.zeros(len(ids), dtype=bool)
+        keepers: List[PointStruct] = []
+        stale_ids: List[str] = []
+        for i in order:
+            if merged[i]:
+                continue
+            group = np.flatnonzero(~merged & (matrix @ matrix[i] >= similarity))
+            merged[group] = True
+            duplicates = [int(j) for j in group if j != i]
+            if not duplicates:
+                continue
+
+            members = [i, *duplicates]
+            payload = {
+                **payloads[i],
+                "version": sum(int(payloads[j].get("version") or 1) for j in members),
+                "created_at": min(
+                    (payloads[j]["created_at"] for j in members if payloads[j].get("created_at")),
+                    default=payloads[i].get("created_at"),
+                ),
+                "created_ts": min(
+                    (payloads[j]["created_ts"] for j in members if payloads[j].get("created_ts")),
+                    default=payloads[i].get("created_ts"),
+                ),
+                "updated_at": datetime.now().isoformat(),
+                "updated_ts": time.time(),
+            }
+            keepers.append(PointStruct(id=ids[i], vector=vectors[i], payload=payload))
+            stale_ids.extend(ids[j] for j in duplicates)
+
+        summary = {"scanned": len(ids), "groups": len(keepers), "removed": len(stale_ids)}
+        if dry_run or not stale_ids:
+            return summary
+
+        for chunk in batch(keepers, size=50):
+            with qdrant_metrics.track("upsert"):
+                self.qdrant.upsert(
+                    collection_name=self.collection_name,
+                    points=chunk,
+                    timeout=qdrant_settings.bulk_timeout,
+                )
+        for chunk in batch(stale_ids, size=256):
+            self.qdrant.delete(
+                collection_name=self.collection_name,
+                points_selector=PointIdsList(points=chunk),
+            )
+
+        with self._index_lock:
+            if self.local_index.loaded:
+                self.local_index.delete(stale_ids)
+                for point in keepers:
+                    self.local_index.upsert(str(point.id), point.vector, point.payload or {})  # type: ignore[arg-type]
+            for point_id in stale_ids:
+                self.lexical_index.remove(point_id)
+            for point in keepers:
+                self.lexical_index.upsert(str(point.id), point.payload or {})
+            self.answer_cache.clear()
+
+        logger.info(f"Compacted knowledge base {summary}")
+        return summary
+
+    def on_knowledge_changed(self, point_id: str, vector: List[float], payload: Dict[str, Any]):
+        """
+        Reflect a point written to the collection (here or by another
+        manager) in the in-process indexes, and drop cached answers it could
+        change: only queries within the answer threshold of the new question
+        can pick it up.
+        """
+        with self._index_lock:
+            if self.local_index.loaded:
+                self.local_index.upsert(point_id, vector, payload)
+            self.lexical_index.upsert(point_id, payload)
+            self.answer_cache.invalidate_near(vector, knowledge_settings.answer_cache_invalidate_radius)
+
+    def stop_refresh(self):
+        self._refresh_stop.set()
 
     def close(self):
+        self.stop_refresh()
         self.qdrant.close()
+
+    async def aclose(self):
+        self.stop_refresh()
+        await self.aqdrant.close()
@@ -0,0 +1,115 @@
+import math
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.embedding_cache import normalize_key
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "am", "be", "do", "does", "did", "i", "you",
+    "your", "we", "our", "me", "my", "it", "to", "of", "for", "on", "in", "at",
+    "and", "or", "can", "could", "would", "will", "what", "how", "there", "any",
+    "have", "has", "with", "this", "that", "please",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in normalize_key(text).split() if token not in STOPWORDS]
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over knowledge entries (question + answer text),
+    plus an exact lookup on the normalized question.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.doc_lengths: Dict[str, int] = {}
+        self.doc_terms: Dict[str, Set[str]] = {}
+        self.question_terms: Dict[str, Set[str]] = {}
+        self.payloads: Dict[str, Dict[str, Any]] = {}
+        self.exact: Dict[str, str] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def upsert(self, doc_id: str, payload: Dict[str, Any]):
+        doc_id = str(doc_id)
+        self.remove(doc_id)
+
+        question = payload.get("question") or ""
+        tokens = tokenize(f"{question} {payload.get('answer') or ''}")
+        counts = Counter(tokens)
+
+        for term, tf in counts.items():
+            self.postings[term][doc_id] = tf
+        self.doc_lengths[doc_id] = len(tokens)
+        self.doc_terms[doc_id] = set(counts)
+        self.question_terms[doc_id] = set(tokenize(question))
+        self.payloads[doc_id] = payload
+        self._total_length += len(tokens)
+
+        if question:
+            self.exact[normalize_key(question)] = doc_id
+
+    def remove(self, doc_id: str):
+        doc_id = str(doc_id)
+        if doc_id not in self.doc_lengths:
+            return
+
+        for term in self.doc_terms.pop(doc_id):
+            postings = self.postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self.postings[term]
+
+        self._total_length -= self.doc_lengths.pop(doc_id)
+        self.question_terms.pop(doc_id, None)
+        payload = self.payloads.pop(doc_id)
+        key = normalize_key(payload.get("question") or "")
+        if self.exact.get(key) == doc_id:
+            del self.exact[key]
+
+    def clear(self):
+        self.__init__(self.k1, self.b)
+
+    def lookup_exact(self, query: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        doc_id = self.exact.get(normalize_key(query))
+        if doc_id is None:
+            return None
+        return doc_id, self.payloads[doc_id]
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[float, str, Dict[str, Any]]]:
+        """Return ``(bm25_score, doc_id, payload)`` for the top-k documents."""
+        if not self.doc_lengths:
+            return []
+
+        n_docs = len(self.doc_lengths)
+        avg_length = self._total_length / n_docs or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = 1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(score, doc_id, self.payloads[doc_id]) for doc_id, score in ranked]
+
+    def question_coverage(self, query: str, doc_id: str) -> float:
+        """
+        How well a document's question matches the query: the overlap of
+        their content terms relative to the larger of the two term sets.
+        """
+        query_terms = set(tokenize(query))
+        question_terms = self.question_terms.get(str(doc_id), set())
+        if not query_terms or not question_terms:
+            return 0.0
+        return len(query_terms & question_terms) / max(len(query_terms), len(question_terms))
@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -12,6 +12,15 @@ class HelpRequestStatus(Enum):
     ESCALATED = "escalated"
 
 
+class HelpRequestEventType(Enum):
+    """Kind of change pushed by the help request feed."""
+    CREATED = "created"
+    UPDATED = "updated"
+    RESOLVED = "resolved"
+    ESCALATED = "escalated"
+    DELETED = "deleted"
+
+
 class HelpRequestCreate(BaseModel):
     question: str = Field(..., description="The customer's question that needs supervisor help")
     room_name: Optional[str] = Field(None, description="Chat room/session identifier")
@@ -28,13 +37,37 @@ class HelpRequestView(BaseModel):
     answer: Optional[str] = Field(None, description="The supervisor's answer (null if pending)")
     status: str = Field(..., description="Current status of the request")
     room_name: Optional[str] = Field(None, description="Chat room/session identifier")
+    subscribers: List[str] = Field(default_factory=list, description="Rooms waiting on this answer (coalesced duplicates)")
     created_at: datetime = Field(..., description="When the request was created")
     updated_at: datetime = Field(..., description="When the request was last updated")
     resolution_notes: Optional[str] = Field(None, description="Internal resolution notes")
     response_time_seconds: Optional[float] = Field(None, description="Time taken to resolve (null if pending)")
     resolved_by: Optional[str] = Field(None, description="Who resolved the request")
     resolved_at: Optional[datetime] = Field(None, description="When it was resolved")
+    escalated_at: Optional[datetime] = Field(None, description="When it breached the response SLA")
     
     class Config:
         arbitrary_types_allowed = True
-        
\ No newline at end of file
+
+
+class HelpRequestEvent(BaseModel):
+    type: HelpRequestEventType = Field(..., description="What happened to the request")
+    request: HelpRequestView = Field(..., description="The request after the change")
+
+
+class HelpRequestSummary(BaseModel):
+    """Projection of a help request for supervisor history lists."""
+    id: str = Field(..., description="UUID of the help request")
+    question: str = Field(..., description="The customer's question")
+    status: str = Field(..., description="Current status of the request")
+    created_at: datetime = Field(..., description="When the request was created")
+    room_name: Optional[str] = Field(None, description="Chat room/session identifier")
+    answer: Optional[str] = Field(None, description="The supervisor's answer (null if pending)")
+    resolved_at: Optional[datetime] = Field(None, description="When it was resolved")
+    response_time_seconds: Optional[float] = Field(None, description="Time taken to resolve (null if pending)")
+
+
+class HelpRequestPage(BaseModel):
+    items: List[HelpRequestSummary] = Field(default_factory=list)
+    next_cursor: Optional[str] = Field(None, description="Pass back to fetch the next page (null on the last page)")
+
@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from qdrant_client.models import FieldCondition, Filter, MatchAny, MatchValue, Range
+
+
+class KnowledgeSource(Enum):
+    """Where a knowledge base entry came from (payload ``source``)."""
+    FAQ = "faq"
+    USER_ADDED = "user_added"
+    SUPERVISOR_RESOLVED = "supervisor_resolved"
+
+
+# Curated answers searched first by request_help before widening to everything
+CURATED_SOURCES = [KnowledgeSource.FAQ.value, KnowledgeSource.SUPERVISOR_RESOLVED.value]
+
+
+def _as_list(value: Union[str, Sequence[str], None]) -> Optional[List[str]]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return [value]
+    return list(value)
+
+
+@dataclass(frozen=True)
+class KnowledgeFilter:
+    """Payload filter for knowledge searches, pushed down to Qdrant."""
+    category: Union[str, Sequence[str], None] = None
+    source: Union[str, Sequence[str], None] = None
+    since: Optional[datetime] = None
+
+    def is_empty(self) -> bool:
+        return self.category is None and self.source is None and self.since is None
+
+    def key(self) -> str:
+        """Stable identity, used to scope cached answers to a filter."""
+        if self.is_empty():
+            return ""
+        return "|".join([
+            ",".join(sorted(_as_list(self.category) or [])),
+            ",".join(sorted(_as_list(self.source) or [])),
+            self.since.isoformat() if self.since else "",
+        ])
+
+    def to_qdrant(self) -> Optional[Filter]:
+        conditions = []
+        for field, value in (("category", self.category), ("source", self.source)):
+            values = _as_list(value)
+            if values is None:
+                continue
+            if len(values) == 1:
+                conditions.append(FieldCondition(key=field, match=MatchValue(value=values[0])))
+            else:
+                conditions.append(FieldCondition(key=field, match=MatchAny(any=values)))
+
+        if self.since is not None:
+            conditions.append(
+                FieldCondition(key="created_ts", range=Range(gte=self.since.timestamp()))
+            )
+
+        return Filter(must=conditions) if conditions else None
+
+    def matches(self, payload: Dict[str, Any]) -> bool:
+        """Same semantics as to_qdrant(), for the in-process indexes."""
+        for field, value in (("category", self.category), ("source", self.source)):
+            values = _as_list(value)
+            if values is not None and payload.get(field) not in values:
+                return False
+
+        if self.since is not None:
+            created_ts = payload.get("created_ts")
+            if created_ts is None or created_ts < self.since.timestamp():
+                return False
+
+        return True
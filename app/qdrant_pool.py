@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import httpx
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from app.config.settings import qdrant_settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[QdrantClient] = None
+_async_client: Optional[AsyncQdrantClient] = None
+
+
+class QdrantMetrics:
+    """In-flight, call count, error and latency counters per Qdrant operation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.operations: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def track(self, operation: str):
+        """Wrap one Qdrant call (sync or awaited) to count it while in flight."""
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            stats = self.operations.setdefault(
+                operation, {"count": 0, "errors": 0, "total_ms": 0.0}
+            )
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                stats["count"] += 1
+                stats["total_ms"] += (time.perf_counter() - started) * 1000
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "operations": {
+                    name: {
+                        "count": int(stats["count"]),
+                        "errors": int(stats["errors"]),
+                        "avg_ms": stats["total_ms"] / stats["count"] if stats["count"] else 0.0,
+                    }
+                    for name, stats in self.operations.items()
+                },
+            }
+
+
+qdrant_metrics = QdrantMetrics()
+
+
+def _connection_kwargs() -> Dict[str, Any]:
+    """Transport options shared by the sync and async clients."""
+    kwargs: Dict[str, Any] = {
+        "url": qdrant_settings.url,
+        "api_key": qdrant_settings.api_key,
+        "timeout": qdrant_settings.bulk_timeout,
+        "prefer_grpc": qdrant_settings.prefer_grpc,
+        "grpc_port": qdrant_settings.grpc_port,
+    }
+
+    if qdrant_settings.prefer_grpc:
+        keepalive_ms = int(qdrant_settings.keepalive_seconds * 1000)
+        kwargs["pool_size"] = qdrant_settings.pool_size
+        kwargs["grpc_options"] = {
+            "grpc.keepalive_time_ms": keepalive_ms,
+            "grpc.keepalive_timeout_ms": 10000,
+            "grpc.keepalive_permit_without_calls": 1,
+        }
+    else:
+        kwargs["limits"] = httpx.Limits(
+            max_connections=qdrant_settings.pool_size,
+            max_keepalive_connections=qdrant_settings.pool_size,
+            keepalive_expiry=qdrant_settings.keepalive_seconds,
+        )
+
+    return kwargs
+
+
+def get_qdrant_client() -> QdrantClient:
+    """Process-wide blocking client (startup work, scripts)."""
+    global _client
+    if _client is None:
+        _client = QdrantClient(**_connection_kwargs())
+        logger.info(f"Qdrant client ready (grpc={qdrant_settings.prefer_grpc})")
+    return _client
+
+
+def get_async_qdrant_client() -> AsyncQdrantClient:
+    """Process-wide pooled async client used on the request path."""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncQdrantClient(**_connection_kwargs())
+        logger.info(
+            f"Async Qdrant client ready (grpc={qdrant_settings.prefer_grpc}, "
+            f"pool={qdrant_settings.pool_size})"
+        )
+    return _async_client
+
+
+def close_qdrant_clients():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+async def aclose_qdrant_clients():
+    global _async_client
+    close_qdrant_clients()
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
@@ -0,0 +1,134 @@
+import atexit
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from app.booking_manager import BookingManager
+from app.db import FirebaseManager
+from app.embeddings import EmbeddingService, get_encoder
+from app.help_request import HelpRequestManager
+from app.knowledge_base import KnowledgeManager
+from app.qdrant_pool import (
+    aclose_qdrant_clients,
+    close_qdrant_clients,
+    get_async_qdrant_client,
+    get_qdrant_client,
+    qdrant_metrics,
+)
+from app.slot_booking import AsyncAvailabilityChecker
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SALON_CONFIG_PATH = "app/json/info.json"
+
+
+def load_salon_config(path: str = SALON_CONFIG_PATH) -> Dict[str, Any]:
+    """Load the salon configuration (info, services, FAQs) from JSON."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ServiceContainer:
+    """
+    Process-wide services shared by every call handled by a worker.
+
+    Built once in the LiveKit prewarm hook so that each call only has to
+    create its session state; clients, the encoder and the managers are
+    borrowed from here.
+    """
+
+    def __init__(self, vad: Optional[Any] = None):
+        self.vad = vad
+        self.salon_config = load_salon_config()
+
+        self.salon_info = {
+            "name": self.salon_config["name"],
+            "address": self.salon_config["address"],
+            "contact": self.salon_config["contact"],
+            "working_hours": self.salon_config["working_hours"],
+            "services": self.salon_config["services"]
+        }
+
+        self.encoder = get_encoder()
+        self.embedder = EmbeddingService(encoder=self.encoder)
+        # Pooled async client for the request path; the sync one serves startup work
+        self.qdrant = get_qdrant_client()
+        self.aqdrant = get_async_qdrant_client()
+        self.qdrant_metrics = qdrant_metrics
+        self.firestore = FirebaseManager().get_firestore_client()
+        self.afirestore = FirebaseManager().get_async_firestore_client()
+
+        # Async reads for the tools; the sync client keeps the snapshot listeners
+        self.availability_checker = AsyncAvailabilityChecker(
+            db=self.firestore,
+            adb=self.afirestore,
+            working_hours=self.salon_config["working_hours"],
+            service_durations=self.salon_config.get("service_durations"),
+        )
+        self.booking_manager = BookingManager(
+            db=self.firestore, availability=self.availability_checker
+        )
+        self.knowledge_base = KnowledgeManager(
+            qdrant=self.qdrant,
+            encoder=self.encoder,
+            faq=self.salon_config.get("faqs"),
+            embedder=self.embedder,
+            services=self.salon_config.get("services"),
+            aqdrant=self.aqdrant,
+        )
+        self.help_manager = HelpRequestManager(
+            db=self.firestore,
+            qdrant=self.aqdrant,
+            encoder=self.encoder,
+            embedder=self.embedder,
+            knowledge=self.knowledge_base,
+        )
+
+        try:
+            self.knowledge_base.initialize()
+        except Exception as e:
+            logger.error(f"Knowledge base initialization failed: {e}")
+
+        logger.info("Service container initialized")
+
+    def _stop_listeners(self):
+        """
+        Unsubscribe Firestore listeners, stop the knowledge refresh thread
+        and compact the embedding cache.
+        """
+        self.help_manager.feed.stop()
+        self.availability_checker.close()
+        self.knowledge_base.stop_refresh()
+        self.embedder.close()
+
+    def close(self):
+        self._stop_listeners()
+        close_qdrant_clients()
+
+    async def aclose(self):
+        self._stop_listeners()
+        await aclose_qdrant_clients()
+
+
+_services: Optional[ServiceContainer] = None
+
+
+def init_services(vad: Optional[Any] = None) -> ServiceContainer:
+    """Build the process-wide container (called from the worker prewarm hook)."""
+    global _services
+    if _services is None:
+        _services = ServiceContainer(vad=vad)
+        # LiveKit has no per-process shutdown hook; job processes exit normally
+        atexit.register(_services.close)
+    elif vad is not None and _services.vad is None:
+        _services.vad = vad
+    return _services
+
+
+def get_services() -> ServiceContainer:
+    """Return the process-wide container, building it on first use."""
+    return init_services()
@@ -1,107 +1,403 @@
+import asyncio
 from asyncio.log import logger
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from datetime import date as Date, timedelta
+import json
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
+from app.calendar_engine import CalendarEngine
+from app.config.settings import booking_settings
 from app.models.available import AvailabilityResult
 from app.db import FirebaseManager
 
 class AvailabilityChecker:
     """Handles availability checking logic with type safety."""
     
-    MAX_BOOKINGS_PER_SLOT = 2
+    MAX_BOOKINGS_PER_SLOT = booking_settings.max_bookings_per_slot
+
+    def __init__(
+        self,
+        db=None,
+        watch_bookings: bool = True,
+        working_hours: Optional[Dict[str, str]] = None,
+        service_durations: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Args:
+            db: Firestore client
+            watch_bookings: Keep cached dates current with snapshot listeners.
+                Without them the cache only learns of bookings through
+                record_slot_counts() (local stand-in for tests).
+            working_hours: Weekday -> hours from info.json; sets the open
+                slots per weekday, and Holiday/Closed days are skipped.
+            service_durations: Service -> minutes from info.json; longer
+                services block several consecutive slots.
+        """
+        self.db = db or FirebaseManager().get_firestore_client()
+        if working_hours is None or service_durations is None:
+            with open("app/json/info.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if working_hours is None:
+                working_hours = data.get("working_hours", {})
+            if service_durations is None:
+                service_durations = data.get("service_durations", {})
+        self.working_hours = working_hours
+        self.calendar = CalendarEngine(
+            working_hours,
+            bucket_minutes=booking_settings.slot_minutes,
+            capacity=self.MAX_BOOKINGS_PER_SLOT,
+            service_durations=service_durations,
+            default_duration=booking_settings.default_service_minutes,
+        )
+        self.collection_name = booking_settings.collection_name
+        self.counters_collection = booking_settings.counters_collection
+        self.watch_bookings = watch_bookings
+        self.max_cached_dates = booking_settings.occupancy_cache_max_dates
+
+        # date -> {slot: bookings covering it}, most recently used last; mirrored in self.calendar
+        self._occupancy: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._watches: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.cache_stats = {"hits": 0, "misses": 0}
+
+    def counter_ref(self, date: str):
+        """The slot counter document for a date (maintained by BookingManager)."""
+        return self.db.collection(self.counters_collection).document(date)
+
+    def bookings_query(self, date: str):
+        return self.db.collection(self.collection_name)\
+            .where("appointment_date", "==", date)
+
+    def count_bookings(self, docs) -> Dict[str, int]:
+        """Per-slot counts from appointment documents, spreading each over its service's slots."""
+        counts: Dict[str, int] = {}
+        for doc in docs:
+            data = doc.to_dict()
+            try:
+                slots = self.calendar.labels_for(data.get("appointment_time") or "", data.get("service"))
+            except ValueError:
+                continue
+            for slot in slots:
+                counts[slot] = counts.get(slot, 0) + 1
+        return counts
+
+    def _read_counts(self, date: str) -> Dict[str, int]:
+        """One document read; dates booked before counters existed are counted once."""
+        snapshot = self.counter_ref(date).get()
+        if snapshot.exists:
+            return dict((snapshot.to_dict() or {}).get("slots", {}))
+        return self.count_bookings(self.bookings_query(date).stream())
+
+    def _load_date(self, date: str) -> Dict[str, int]:
+        """Read a date's counter once, then keep it current with a snapshot listener."""
+        return self._cache_counts(date, self._read_counts(date))
+
+    def _cache_counts(self, date: str, counts: Dict[str, int]) -> Dict[str, int]:
+        with self._lock:
+            self._occupancy[date] = counts
+            self.calendar.load_counts(date, counts)
+            evicted = []
+            while len(self._occupancy) > self.max_cached_dates:
+                old_date, _ = self._occupancy.popitem(last=False)
+                self.calendar.drop(old_date)
+                evicted.append(self._watches.pop(old_date, None))
+
+        for watch in evicted:
+            if watch is not None:
+                watch.unsubscribe()
+
+        if self.watch_bookings and date not in self._watches:
+            self._watches[date] = self.counter_ref(date).on_snapshot(
+                lambda docs, _changes, _read_time: self._on_snapshot(date, docs)
+            )
+        return counts
+
+    def _on_snapshot(self, date: str, docs):
+        """Listener callback: replace the date's counts with the counter document."""
+        for doc in docs:
+            if not doc.exists:
+                continue
+            counts = dict((doc.to_dict() or {}).get("slots", {}))
+            with self._lock:
+                if date in self._occupancy:
+                    self._occupancy[date] = counts
+                    self.calendar.load_counts(date, counts)
+
+    def record_slot_counts(self, date: str, slots: Dict[str, int]):
+        """Reflect a reservation made by this process before its listener fires."""
+        with self._lock:
+            counts = self._occupancy.get(date)
+            if counts is not None:
+                for slot, count in slots.items():
+                    counts[slot] = max(counts.get(slot, 0), count)
+                self.calendar.load_counts(date, counts)
+
+    def close(self):
+        with self._lock:
+            watches = list(self._watches.values())
+            self._watches.clear()
+            for date in self._occupancy:
+                self.calendar.drop(date)
+            self._occupancy.clear()
+        for watch in watches:
+            watch.unsubscribe()
+
+    def _cached_counts(self, date: str) -> Optional[Dict[str, int]]:
+        with self._lock:
+            counts = self._occupancy.get(date)
+            if counts is None:
+                self.cache_stats["misses"] += 1
+                return None
+            self._occupancy.move_to_end(date)
+            self.cache_stats["hits"] += 1
+            return dict(counts)
 
-    #hard coded for temporarily 
-    BUSINESS_HOURS = [
-        "9:00 AM", "10:00 AM", "11:00 AM", 
-        "1:00 PM", "2:00 PM", "3:00 PM", "4:00 PM"
-    ]
-    
-    def __init__(self):
-        self.firebase = FirebaseManager()
-        self.db = self.firebase.get_firestore_client()
-    
     def _get_slot_counts(self, date: str) -> Dict[str, int]:
-        """Get booking counts for each slot on a given date."""
-        try:
-            bookings_ref = self.db.collection("appointments")\
-                .where("appointment_date", "==", date)
-            bookings = bookings_ref.stream()
-            slot_counts: Dict[str, int] = {slot: 0 for slot in self.BUSINESS_HOURS}
-            
-            for doc in bookings:
-                data = doc.to_dict()
-                slot_time = data.get("appointment_time")
-                if slot_time and slot_time in slot_counts:
-                    slot_counts[slot_time] += 1
-            
-            return slot_counts
-            
-        except Exception as e:
-            logger.error(f"Error fetching slot counts: {e}")
-            return {slot: 0 for slot in self.BUSINESS_HOURS}
+        """Get booking counts for each slot on a given date (cached per date)."""
+        counts = self._cached_counts(date)
+        if counts is None:
+            counts = self._load_date(date)
+        return counts
     
-    def _get_available_slots(self, slot_counts: Dict[str, int]) -> List[str]:
-        """Get list of available slots based on counts."""
+    def is_open(self, day: Date) -> bool:
+        return self.calendar.is_open_day(day.isoformat())
+
+    def _split_cached(self, dates: List[str]) -> Tuple[Dict[str, Dict[str, int]], List[str]]:
+        result: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            for date in dates:
+                if date in self._occupancy:
+                    result[date] = dict(self._occupancy[date])
+        missing = [date for date in dates if date not in result]
+        self.cache_stats["hits"] += len(result)
+        self.cache_stats["misses"] += len(missing)
+        return result, missing
+
+    def _appointments_in_range(self, dates: Set[str]):
+        return self.db.collection(self.collection_name)\
+            .where("appointment_date", ">=", min(dates))\
+            .where("appointment_date", "<=", max(dates))
+
+    def _count_by_date(self, dates: Set[str], docs) -> Dict[str, Dict[str, int]]:
+        by_date: Dict[str, List[Any]] = {date: [] for date in dates}
+        for doc in docs:
+            day = doc.to_dict().get("appointment_date")
+            if day in by_date:
+                by_date[day].append(doc)
+        return {date: self.count_bookings(day_docs) for date, day_docs in by_date.items()}
+
+    def _counts_for_dates(self, dates: List[str]) -> Dict[str, Dict[str, int]]:
+        """
+        Slot counts for several dates: cached dates are free, the rest cost
+        one batched counter read plus, for dates without a counter yet, one
+        appointment range query.
+        """
+        result, missing = self._split_cached(dates)
+        if not missing:
+            return result
+
+        uncounted = set(missing)
+        for snapshot in self.db.get_all([self.counter_ref(date) for date in missing]):
+            if snapshot.exists:
+                result[snapshot.id] = dict((snapshot.to_dict() or {}).get("slots", {}))
+                uncounted.discard(snapshot.id)
+
+        if uncounted:
+            docs = self._appointments_in_range(uncounted).stream()
+            result.update(self._count_by_date(uncounted, docs))
+
+        for date in missing:
+            self._cache_counts(date, result[date])
+        return result
+
+    def _open_dates(self, start_date: str, days: int) -> List[str]:
+        first = Date.fromisoformat(start_date)
         return [
-            slot for slot, count in slot_counts.items() 
-            if count < self.MAX_BOOKINGS_PER_SLOT
+            day.isoformat()
+            for day in (first + timedelta(days=offset) for offset in range(days))
+            if self.is_open(day)
         ]
-    
+
+    def find_next_available(
+        self,
+        start_date: str,
+        count: int = 3,
+        days: int = 14,
+        time: Optional[str] = None,
+        service: Optional[str] = None,
+    ) -> AvailabilityResult:
+        """
+        Find the next ``count`` open slots from ``start_date`` over the
+        following ``days`` days, skipping days the salon is closed.
+
+        Args:
+            start_date: First date to consider, "YYYY-MM-DD"
+            count: How many openings to return
+            days: How far ahead to look
+            time: Only consider this slot (e.g. "10:00 AM") on each day
+            service: Service to fit; long services need consecutive free slots
+
+        Returns:
+            AvailabilityResult whose available_slots are "YYYY-MM-DD <time>" strings
+        """
+        try:
+            dates = self._open_dates(start_date, days)
+            counts = self._counts_for_dates(dates)
+            return self._next_available_result(start_date, dates, counts, count, days, time, service)
+        except ValueError:
+            return self._invalid_date_result(start_date, time)
+        except Exception as e:
+            logger.error(f"Next-available search failed: {e}")
+            return self._error_result(start_date, time)
+
+    def _next_available_result(
+        self,
+        start_date: str,
+        dates: List[str],
+        counts: Dict[str, Dict[str, int]],
+        count: int,
+        days: int,
+        time: Optional[str],
+        service: Optional[str],
+    ) -> AvailabilityResult:
+        # Use the counts just read: with more dates than the cache holds, the
+        # earliest ones have already been evicted from the calendar
+        found = self.calendar.next_available(dates, count, service=service, time=time, counts=counts)
+        openings = [f"{date} {slot}" for date, slot in found]
+
+        if openings:
+            return AvailabilityResult(
+                status="available",
+                message=f"Next available times:\n{self._format_available_slots(openings)}",
+                available_slots=openings,
+                checked_date=start_date,
+                checked_time=time
+            )
+
+        return AvailabilityResult(
+            status="all_booked",
+            message=f"We're fully booked for the {days} days from {start_date}.",
+            available_slots=[],
+            checked_date=start_date,
+            checked_time=time
+        )
+
+    @staticmethod
+    def _invalid_date_result(date: str, time: Optional[str]) -> AvailabilityResult:
+        return AvailabilityResult(
+            status="invalid_date",
+            message=f"{date} is not a valid date. Please use YYYY-MM-DD.",
+            available_slots=[],
+            checked_date=date,
+            checked_time=time
+        )
+
+    @staticmethod
+    def _error_result(date: str, time: Optional[str]) -> AvailabilityResult:
+        return AvailabilityResult(
+            status="error",
+            message="I'm having trouble checking availability. Let me get help from my supervisor.",
+            available_slots=[],
+            checked_date=date,
+            checked_time=time
+        )
+
     def _format_available_slots(self, slots: List[str]) -> str:
         """Format available slots for display."""
         if not slots:
             return "No slots available"
         return "\n".join(f"• {slot}" for slot in slots)
+
+    def _format_time_ranges(self, slots: List[str]) -> str:
+        """Collapse consecutive start times into "from X to Y" lines."""
+        if not slots:
+            return "No slots available"
+        buckets = [self.calendar.bucket_of(slot) for slot in slots]
+        runs: List[Tuple[int, int]] = []
+        for bucket in buckets:
+            if runs and bucket == runs[-1][1] + 1:
+                runs[-1] = (runs[-1][0], bucket)
+            else:
+                runs.append((bucket, bucket))
+        return "\n".join(
+            f"• {self.calendar.label(first)}" if first == last
+            else f"• any time from {self.calendar.label(first)} to {self.calendar.label(last)}"
+            for first, last in runs
+        )
     
-    def check_availability(self, date: str, time: Optional[str] = None) -> AvailabilityResult:
+    def check_availability(
+        self, date: str, time: Optional[str] = None, service: Optional[str] = None
+    ) -> AvailabilityResult:
         """
         Check slot availability for a given date and optionally time.
         
         Args:
             date: Date in format "YYYY-MM-DD"
-            time: Optional specific time slot (e.g., "10:00 AM")
+            time: Optional specific time slot (e.g., "10:00 AM", "10am", "14:30")
+            service: Optional service; long services need consecutive free slots
         
         Returns:
             AvailabilityResult with status and message
         """
         try:
-            slot_counts = self._get_slot_counts(date)
-            available_slots = self._get_available_slots(slot_counts)
-            
-            if time:
-                return self._check_specific_time(
-                    date, time, slot_counts, available_slots
-                )
-            
-            return self._check_all_slots(date, available_slots)
-            
+            if not self.calendar.is_open_day(date):
+                return self._closed_result(date, time)
+            self._get_slot_counts(date)
+            return self._availability_result(date, time, service)
+        except ValueError:
+            return self._invalid_date_result(date, time)
         except Exception as e:
             logger.error(f"Availability check failed: {e}")
-            return AvailabilityResult(
-                status="error",
-                message="I'm having trouble checking availability. Let me get help from my supervisor.",
-                available_slots=[],
-                checked_date=date,
-                checked_time=time
+            return self._error_result(date, time)
+
+    def _availability_result(self, date: str, time: Optional[str], service: Optional[str]) -> AvailabilityResult:
+        with self._lock:
+            available_slots = self.calendar.available_starts(date, service)
+        
+        if time:
+            return self._check_specific_time(
+                date, time, service, available_slots
             )
+        
+        return self._check_all_slots(date, available_slots)
+
+    def _closed_result(self, date: str, time: Optional[str]) -> AvailabilityResult:
+        weekday = Date.fromisoformat(date).strftime("%A")
+        return AvailabilityResult(
+            status="closed",
+            message=f"We're closed on {weekday}s ({date}). Would you like to check another date?",
+            available_slots=[],
+            checked_date=date,
+            checked_time=time
+        )
     
-    def _check_specific_time(self,date: str,time: str,slot_counts: Dict[str, int],available_slots: List[str]) -> AvailabilityResult:
+    def _check_specific_time(self,date: str,time: str,service: Optional[str],available_slots: List[str]) -> AvailabilityResult:
         """Check availability for a specific time slot."""
         
-        if time not in self.BUSINESS_HOURS:
+        try:
+            slot = self.calendar.normalize_time(time)
+            within_hours = self.calendar.is_within_hours(date, slot, service)
+        except ValueError:
+            slot, within_hours = time, False
+
+        if not within_hours:
+            hours = self.working_hours.get(Date.fromisoformat(date).strftime("%A"), "")
+            open_slots = self.calendar.open_labels(date)
             return AvailabilityResult(
                 status="invalid_time",
                 message=(
-                    f"{time} is outside our business hours.\n"
-                    f"Available times: {', '.join(self.BUSINESS_HOURS)}"
+                    f"{time} doesn't work for that appointment: we're open {hours} "
+                    f"and bookings start every {self.calendar.bucket_minutes} minutes.\n"
+                    f"Available times on {date}:\n{self._format_time_ranges(available_slots)}"
                 ),
-                available_slots=self.BUSINESS_HOURS,
+                available_slots=open_slots,
                 checked_date=date,
                 checked_time=time
             )
         
-        current_bookings = slot_counts.get(time, 0)
-        
-        if current_bookings < self.MAX_BOOKINGS_PER_SLOT:
+        time = slot
+        if slot in available_slots:
             return AvailabilityResult(
                 status="available",
                 message=f"{time} on {date} is available!",
@@ -112,7 +408,7 @@ class AvailabilityChecker:
         
         #alternatives
         if available_slots:
-            alternatives = self._format_available_slots(available_slots)
+            alternatives = self._format_time_ranges(available_slots)
             return AvailabilityResult(
                 status="booked",
                 message=(
@@ -136,7 +432,7 @@ class AvailabilityChecker:
         """Check availability for all slots on a date."""
         
         if available_slots:
-            slots_formatted = self._format_available_slots(available_slots)
+            slots_formatted = self._format_time_ranges(available_slots)
             return AvailabilityResult(
                 status="available",
                 message=f"Available times on {date}:\n{slots_formatted}",
@@ -152,4 +448,133 @@ class AvailabilityChecker:
             ),
             available_slots=[],
             checked_date=date
-        )
\ No newline at end of file
+        )
+
+
+class AsyncAvailabilityChecker(AvailabilityChecker):
+    """
+    AvailabilityChecker for async tools: Firestore reads go through the
+    asyncio client so a check never blocks the event loop. Same
+    AvailabilityResult contract, cache and snapshot listeners as the base
+    class; the sync helpers BookingManager relies on are inherited as-is.
+    """
+
+    def __init__(
+        self,
+        db=None,
+        adb=None,
+        watch_bookings: bool = True,
+        working_hours: Optional[Dict[str, str]] = None,
+        service_durations: Optional[Dict[str, int]] = None,
+    ):
+        super().__init__(
+            db=db,
+            watch_bookings=watch_bookings,
+            working_hours=working_hours,
+            service_durations=service_durations,
+        )
+        self.adb = adb or FirebaseManager().get_async_firestore_client()
+        # Concurrent checks of one uncached date share a single read
+        self._inflight: Dict[str, "asyncio.Future[Dict[str, int]]"] = {}
+
+    def _async_counter_ref(self, date: str):
+        return self.adb.collection(self.counters_collection).document(date)
+
+    async def _read_counts_async(self, date: str) -> Dict[str, int]:
+        snapshot = await self._async_counter_ref(date).get()
+        if snapshot.exists:
+            return dict((snapshot.to_dict() or {}).get("slots", {}))
+        query = self.adb.collection(self.collection_name)\
+            .where("appointment_date", "==", date)
+        return self.count_bookings([doc async for doc in query.stream()])
+
+    async def _load_date_async(self, date: str) -> Dict[str, int]:
+        pending = self._inflight.get(date)
+        if pending is not None:
+            return dict(await pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[date] = future
+        try:
+            counts = self._cache_counts(date, await self._read_counts_async(date))
+            future.set_result(counts)
+            return counts
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a failure nobody else awaited is not logged twice
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(date, None)
+
+    async def _get_slot_counts_async(self, date: str) -> Dict[str, int]:
+        counts = self._cached_counts(date)
+        if counts is None:
+            counts = await self._load_date_async(date)
+        return counts
+
+    async def check_availability(  # type: ignore[override]
+        self, date: str, time: Optional[str] = None, service: Optional[str] = None
+    ) -> AvailabilityResult:
+        """Async check_availability(); see AvailabilityChecker.check_availability."""
+        try:
+            if not self.calendar.is_open_day(date):
+                return self._closed_result(date, time)
+            await self._get_slot_counts_async(date)
+            return self._availability_result(date, time, service)
+        except ValueError:
+            return self._invalid_date_result(date, time)
+        except Exception as e:
+            logger.error(f"Availability check failed: {e}")
+            return self._error_result(date, time)
+
+    async def check_many(
+        self, checks: Sequence[Tuple[str, Optional[str]]], service: Optional[str] = None
+    ) -> List[AvailabilityResult]:
+        """Check several (date, time) pairs concurrently; results keep the input order."""
+        return list(await asyncio.gather(
+            *(self.check_availability(date, time, service) for date, time in checks)
+        ))
+
+    async def _counts_for_dates_async(self, dates: List[str]) -> Dict[str, Dict[str, int]]:
+        result, missing = self._split_cached(dates)
+        if not missing:
+            return result
+
+        uncounted = set(missing)
+        refs = [self._async_counter_ref(date) for date in missing]
+        async for snapshot in self.adb.get_all(refs):
+            if snapshot.exists:
+                result[snapshot.id] = dict((snapshot.to_dict() or {}).get("slots", {}))
+                uncounted.discard(snapshot.id)
+
+        if uncounted:
+            query = self.adb.collection(self.collection_name)\
+                .where("appointment_date", ">=", min(uncounted))\
+                .where("appointment_date", "<=", max(uncounted))
+            docs = [doc async for doc in query.stream()]
+            result.update(self._count_by_date(uncounted, docs))
+
+        for date in missing:
+            self._cache_counts(date, result[date])
+        return result
+
+    async def find_next_available(  # type: ignore[override]
+        self,
+        start_date: str,
+        count: int = 3,
+        days: int = 14,
+        time: Optional[str] = None,
+        service: Optional[str] = None,
+    ) -> AvailabilityResult:
+        """Async find_next_available(); see AvailabilityChecker.find_next_available."""
+        try:
+            dates = self._open_dates(start_date, days)
+            counts = await self._counts_for_dates_async(dates)
+            return self._next_available_result(start_date, dates, counts, count, days, time, service)
+        except ValueError:
+            return self._invalid_date_result(start_date, time)
+        except Exception as e:
+            logger.error(f"Next-available search failed: {e}")
+            return self._error_result(start_date, time)
+
@@ -0,0 +1,159 @@
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+logger = logging.getLogger(__name__)
+
+
+class LocalVectorIndex:
+    """
+    In-process mirror of a small Qdrant collection.
+
+    Vectors are kept L2-normalized in one contiguous float32 matrix (grown
+    by doubling), with ids and payloads in parallel lists, so a top-k cosine
+    query is a single matrix-vector product.
+    """
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim
+        self.ids: List[str] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._matrix = np.zeros((0, dim or 0), dtype=np.float32)
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, point_id: object) -> bool:
+        return str(point_id) in self._positions
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The used rows of the vector matrix."""
+        return self._matrix[: len(self.ids)]
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _reserve(self, rows: int):
+        if self.dim is None:
+            raise ValueError("Vector dimension unknown")
+        capacity = self._matrix.shape[0]
+        if rows <= capacity and self._matrix.shape[1] == self.dim:
+            return
+        new_capacity = max(rows, capacity * 2, 16)
+        grown = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        if self.ids:
+            grown[: len(self.ids)] = self._matrix[: len(self.ids)]
+        self._matrix = grown
+
+    def upsert_many(
+        self,
+        ids: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        payloads: Sequence[Dict[str, Any]],
+    ):
+        if not ids:
+            return
+
+        array = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1))
+        if self.dim is None:
+            self.dim = array.shape[1]
+        self._reserve(len(self.ids) + len(ids))
+
+        for point_id, vector, payload in zip(ids, array, payloads):
+            point_id = str(point_id)
+            position = self._positions.get(point_id)
+            if position is None:
+                position = len(self.ids)
+                self._positions[point_id] = position
+                self.ids.append(point_id)
+                self.payloads.append(payload)
+            else:
+                self.payloads[position] = payload
+            self._matrix[position] = vector
+
+    def upsert(self, point_id: str, vector: Sequence[float], payload: Dict[str, Any]):
+        self.upsert_many([point_id], [vector], [payload])
+
+    def delete(self, ids: Sequence[str]):
+        """Remove points by moving the last row into each freed slot."""
+        for point_id in ids:
+            position = self._positions.pop(str(point_id), None)
+            if position is None:
+                continue
+            last = len(self.ids) - 1
+            if position != last:
+                moved_id = self.ids[last]
+                self.ids[position] = moved_id
+                self.payloads[position] = self.payloads[last]
+                self._matrix[position] = self._matrix[last]
+                self._positions[moved_id] = position
+            self.ids.pop()
+            self.payloads.pop()
+
+    def clear(self):
+        self.ids = []
+        self.payloads = []
+        self._positions = {}
+        self._matrix = np.zeros((0, self.dim or 0), dtype=np.float32)
+
+    def search(
+        self,
+        vector: Sequence[float],
+        top_k: int = 3,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[Tuple[float, str, Dict[str, Any]]]:
+        """
+        Return ``(score, point_id, payload)`` for the top-k cosine matches,
+        optionally restricted to payloads accepted by ``predicate``.
+        """
+        if not self.ids:
+            return []
+
+        query = self._normalize(np.asarray(vector, dtype=np.float32))
+        scores = self.matrix @ query
+
+        if predicate is not None:
+            allowed = np.fromiter((predicate(p) for p in self.payloads), dtype=bool, count=len(self.ids))
+            if not allowed.any():
+                return []
+            scores = np.where(allowed, scores, -np.inf)
+            top_k = min(top_k, int(allowed.sum()))
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self.ids[i], self.payloads[i]) for i in top]
+
+    def load_from_qdrant(self, client: QdrantClient, collection_name: str, batch_size: int = 256) -> int:
+        """Replace the mirror with every point (and vector) in the collection."""
+        self.clear()
+        offset = None
+
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            if points:
+                self.upsert_many(
+                    [str(p.id) for p in points],
+                    [p.vector for p in points],  # type: ignore[misc]
+                    [p.payload or {} for p in points],
+                )
+            if offset is None:
+                break
+
+        self.loaded = True
+        logger.info(f"Loaded {len(self)} points into local index from '{collection_name}'")
+        return len(self)
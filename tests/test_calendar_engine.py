@@ -0,0 +1,67 @@
+import pytest
+
+from app.calendar_engine import CalendarEngine, parse_clock
+
+WORKING_HOURS = {
+    "Monday": "9AM - 12PM",
+    "Tuesday": "9AM - 12PM",
+    "Wednesday": "Holiday",
+}
+DURATIONS = {"haircut": 30, "highlights": 120}
+
+MONDAY, TUESDAY, WEDNESDAY = "2026-10-19", "2026-10-20", "2026-10-21"
+
+
+@pytest.fixture
+def engine():
+    return CalendarEngine(WORKING_HOURS, bucket_minutes=30, capacity=2, service_durations=DURATIONS)
+
+
+@pytest.mark.parametrize(
+    "text, minutes",
+    [("10:00 AM", 600), ("10am", 600), ("2 PM", 840), ("14:30", 870), ("12 pm", 720), ("12am", 0)],
+)
+def test_parse_clock(text, minutes):
+    assert parse_clock(text) == minutes
+
+
+def test_parse_clock_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_clock("noonish")
+
+
+def test_free_starts_needs_every_bucket_a_service_spans(engine):
+    engine.load_counts(MONDAY, {"10:30 AM": 2})
+
+    assert engine.available_starts(MONDAY, "haircut") == [
+        "9:00 AM", "9:30 AM", "10:00 AM", "11:00 AM", "11:30 AM",
+    ]
+    # Two hours fits only before the full 10:30 bucket, and not past closing
+    assert engine.available_starts(MONDAY, "highlights") == []
+    assert engine.free_starts([TUESDAY], 4)[0].sum() == 0  # not loaded
+
+
+def test_free_starts_uses_passed_counts_over_loaded_rows(engine):
+    engine.load_counts(MONDAY, {"9:00 AM": 2})
+    starts = engine.free_starts([MONDAY], 1, counts={MONDAY: {}})[0]
+    assert engine.label(int(starts.nonzero()[0][0])) == "9:00 AM"
+
+
+def test_next_available_skips_closed_and_full_days(engine):
+    full = {label: 2 for label in engine.open_labels(MONDAY)}
+    counts = {MONDAY: full, WEDNESDAY: {}, "2026-10-26": {}}
+
+    found = engine.next_available([MONDAY, WEDNESDAY, "2026-10-26"], 2, "highlights", counts=counts)
+    assert found == [("2026-10-26", "9:00 AM"), ("2026-10-26", "9:30 AM")]
+
+    at_ten = engine.next_available([MONDAY, "2026-10-26"], 3, time="10am", counts=counts)
+    assert at_ten == [("2026-10-26", "10:00 AM")]
+
+
+def test_dropped_rows_are_reused(engine):
+    engine.load_counts(MONDAY, {"9:00 AM": 1})
+    engine.drop(MONDAY)
+    engine.load_counts(TUESDAY, {})
+
+    assert MONDAY not in engine and TUESDAY in engine
+    assert engine.available_starts(TUESDAY, "haircut")[0] == "9:00 AM"
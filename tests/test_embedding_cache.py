@@ -0,0 +1,92 @@
+import asyncio
+import os
+
+import numpy as np
+
+from app.embedding_cache import DiskEmbeddingStore, EmbeddingCache
+
+DIM = 4
+
+
+def _vector(i):
+    return np.full(DIM, i, dtype=np.float32)
+
+
+def _store(path, max_items=8):
+    return DiskEmbeddingStore(str(path), DIM, max_items, "model")
+
+
+def _log_lines(path):
+    with open(os.path.join(path, DiskEmbeddingStore.LOG_FILE), "rb") as f:
+        return f.read().splitlines()
+
+
+def test_batches_append_to_the_log_and_reopen(tmp_path):
+    store = _store(tmp_path)
+    store.put_many(["a", "b"], [_vector(1), _vector(2)])
+    store.put_many(["c"], [_vector(3)])
+
+    # index.json is untouched until compaction; the log holds the rows
+    assert len(_log_lines(tmp_path)) == 5
+
+    reopened = _store(tmp_path)
+    assert len(reopened) == 3
+    np.testing.assert_array_equal(reopened.get("b"), _vector(2))
+    assert reopened.next_row == 3
+
+
+def test_writers_pick_up_each_others_rows(tmp_path):
+    first, second = _store(tmp_path), _store(tmp_path)
+    first.put_many(["a"], [_vector(1)])
+    second.put_many(["b"], [_vector(2)])
+    first.put_many(["c"], [_vector(3)])
+
+    assert first.rows == {"a": 0, "b": 1, "c": 2}
+    assert second.get("c") is None  # not caught up yet
+    second.put_many(["d"], [_vector(4)])
+    np.testing.assert_array_equal(second.get("c"), _vector(3))
+
+
+def test_compaction_starts_a_new_log_other_writers_reload(tmp_path):
+    first, second = _store(tmp_path, max_items=4), _store(tmp_path, max_items=4)
+    for i in range(6):
+        first.put_many([f"k{i}"], [_vector(i)])
+
+    assert len(_log_lines(tmp_path)) < 6
+    second.put_many(["x"], [_vector(9)])
+    assert set(second.rows) == {"k3", "k4", "k5", "x"}
+    np.testing.assert_array_equal(second.get("k5"), _vector(5))
+    assert first.get("k2") is None  # evicted by the ring buffer
+
+
+def test_close_compacts_the_log(tmp_path):
+    store = _store(tmp_path)
+    store.put_many(["a"], [_vector(1)])
+    store.close()
+
+    assert _log_lines(tmp_path) == []
+    np.testing.assert_array_equal(_store(tmp_path).get("a"), _vector(1))
+
+
+def test_torn_log_line_is_skipped(tmp_path):
+    store = _store(tmp_path)
+    store.put_many(["a"], [_vector(1)])
+    with open(os.path.join(tmp_path, DiskEmbeddingStore.LOG_FILE), "ab") as f:
+        f.write(b'{"key": "b", "ro')
+
+    other = _store(tmp_path)
+    other.put_many(["c"], [_vector(3)])
+
+    reopened = _store(tmp_path)
+    assert set(reopened.rows) == {"a", "c"}
+    np.testing.assert_array_equal(reopened.get("c"), _vector(3))
+
+
+def test_cache_opens_persisted_store_off_the_loop(tmp_path):
+    EmbeddingCache("model", cache_dir=str(tmp_path)).put("Hello there!", [1.0, 2.0, 3.0, 4.0])
+
+    cache = EmbeddingCache("model", cache_dir=str(tmp_path))
+    assert cache.get("hello there") is None  # lookups never open the store themselves
+    asyncio.run(cache.open_disk())
+    assert cache.get("hello there") == [1.0, 2.0, 3.0, 4.0]
+    assert cache.stats()["disk_hits"] == 1
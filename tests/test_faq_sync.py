@@ -0,0 +1,89 @@
+import hashlib
+import uuid
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import PointStruct
+
+from app.embedding_cache import EmbeddingCache
+from app.embeddings import EmbeddingService
+from app.knowledge_base import LEGACY_FAQ_SOURCE, KnowledgeManager
+
+DIM = 8
+FAQS = [
+    {"question": "What are your opening hours?", "answer": "9am to 7pm, Monday to Saturday."},
+    {"question": "Do you take walk-ins?", "answer": "Yes, when a stylist is free."},
+]
+
+
+class FakeEncoder:
+    """Deterministic unit vectors derived from the text."""
+
+    def get_sentence_embedding_dimension(self):
+        return DIM
+
+    def encode(self, texts):
+        rows = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:4], "little")
+            rng = np.random.default_rng(seed)
+            vector = rng.normal(size=DIM)
+            rows.append(vector / np.linalg.norm(vector))
+        return np.array(rows, dtype=np.float32)
+
+
+def _manager(qdrant, faqs=FAQS):
+    encoder = FakeEncoder()
+    manager = KnowledgeManager(
+        qdrant=qdrant,
+        aqdrant=AsyncQdrantClient(":memory:"),
+        encoder=encoder,
+        embedder=EmbeddingService(encoder=encoder, cache=EmbeddingCache(model_name="test")),
+        faq=faqs,
+        services={},
+    )
+    manager._init_collection()
+    return manager
+
+
+def _sources(qdrant, manager):
+    points, _ = qdrant.scroll(manager.collection_name, limit=100, with_payload=True)
+    return {str(p.id): p.payload["source"] for p in points}
+
+
+def test_learned_answer_filed_under_faq_survives_sync():
+    qdrant = QdrantClient(":memory:")
+    manager = _manager(qdrant)
+    manager._sync_faqs()
+
+    learned_id = manager.add_knowledge_sync(
+        "Do you do bridal packages?", "Yes, ask for the bridal menu.", category="faq"
+    )
+    manager._sync_faqs()
+
+    sources = _sources(qdrant, manager)
+    assert sources[learned_id] == "user_added"
+    assert sorted(sources.values()) == ["faq", "faq", "user_added"]
+
+
+def test_sync_replaces_legacy_and_removed_faqs():
+    qdrant = QdrantClient(":memory:")
+    manager = _manager(qdrant)
+    legacy_id = str(uuid.uuid4())
+    qdrant.upsert(
+        manager.collection_name,
+        points=[PointStruct(
+            id=legacy_id,
+            vector=[1.0] + [0.0] * (DIM - 1),
+            payload={"question": "Old FAQ", "answer": "Old answer", "category": "faq",
+                     "source": LEGACY_FAQ_SOURCE},
+        )],
+    )
+
+    manager._sync_faqs()
+    sources = _sources(qdrant, manager)
+    assert legacy_id not in sources
+    assert sorted(sources.values()) == ["faq", "faq"]
+
+    _manager(qdrant, faqs=FAQS[:1])._sync_faqs()
+    assert list(_sources(qdrant, manager).values()) == ["faq"]
@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.help_feed import HelpRequestFeed
+from app.models.help_request import HelpRequestEventType
+
+CREATED = datetime(2026, 1, 1, 10, 0, 0)
+
+
+def request_doc(status="pending", updated=0, request_id="r1", **extra):
+    return {
+        "id": request_id,
+        "question": "do you sell shampoo",
+        "status": status,
+        "created_at": CREATED.isoformat(),
+        "updated_at": (CREATED + timedelta(seconds=updated)).isoformat(),
+        **extra,
+    }
+
+
+def test_apply_tracks_open_requests_and_classifies_changes():
+    feed = HelpRequestFeed()
+
+    created = feed.apply(request_doc())
+    escalated = feed.apply(request_doc("escalated", updated=1))
+    resolved = feed.apply(request_doc("resolved", updated=2, answer="yes"))
+
+    assert [created.type, escalated.type, resolved.type] == [
+        HelpRequestEventType.CREATED,
+        HelpRequestEventType.ESCALATED,
+        HelpRequestEventType.RESOLVED,
+    ]
+    assert feed.open_requests() == []
+    assert "r1" in feed.recently_resolved
+
+
+def test_apply_ignores_stale_and_repeated_versions():
+    feed = HelpRequestFeed()
+    feed.apply(request_doc("resolved", updated=5, answer="yes"))
+
+    assert feed.apply(request_doc("pending", updated=1)) is None
+    assert feed.apply(request_doc("resolved", updated=5, answer="yes")) is None
+    assert feed.open_requests() == []
+
+
+def test_apply_skips_malformed_documents():
+    feed = HelpRequestFeed()
+    assert feed.apply({"id": "r1"}) is None
+    assert feed.open_requests() == []
+
+
+def test_wait_for_answer_returns_resolution_published_later():
+    async def scenario():
+        feed = HelpRequestFeed()
+        feed.apply(request_doc())
+        waiter = asyncio.create_task(feed.wait_for_answer("r1", timeout=1))
+        await asyncio.sleep(0)
+        feed.apply(request_doc("resolved", updated=1, answer="yes"))
+        return await waiter
+
+    resolved = asyncio.run(scenario())
+    assert resolved is not None and resolved.answer == "yes"
+
+
+def test_wait_for_answer_sees_recent_resolution_and_times_out_otherwise():
+    async def scenario():
+        feed = HelpRequestFeed()
+        feed.apply(request_doc("resolved", updated=1, answer="yes"))
+        feed.apply(request_doc(request_id="r2"))
+        return (
+            await feed.wait_for_answer("r1", timeout=0.05),
+            await feed.wait_for_answer("r2", timeout=0.05),
+        )
+
+    already_resolved, still_pending = asyncio.run(scenario())
+    assert already_resolved is not None and already_resolved.answer == "yes"
+    assert still_pending is None
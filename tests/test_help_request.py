@@ -0,0 +1,31 @@
+import asyncio
+
+from app.help_request import HelpRequestManager, caller_rooms
+
+
+def test_caller_rooms_keeps_original_caller_first():
+    assert caller_rooms("room-a", ["room-b", "room-a", None, "room-c"]) == ["room-a", "room-b", "room-c"]
+    assert caller_rooms("room-a", None) == ["room-a"]
+    assert caller_rooms(None, ["room-b"]) == ["room-b"]
+    assert caller_rooms(None, []) == []
+
+
+def test_notify_caller_reaches_original_room_and_subscribers(monkeypatch):
+    sent = []
+
+    async def record(url, message, label):
+        sent.append(message["room_name"])
+
+    monkeypatch.setattr(HelpRequestManager, "_post_webhook", staticmethod(record))
+    manager = object.__new__(HelpRequestManager)
+    request = {
+        "id": "req-1",
+        "question": "Do you do keratin treatments?",
+        "room_name": "room-a",
+        # Written by a coalesced caller before the original room was seeded
+        "subscribers": ["room-b"],
+    }
+
+    asyncio.run(manager._notify_caller(request, "Yes"))
+
+    assert sent == ["room-a", "room-b"]
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from app.kb_snapshot import ALIGNMENT, SnapshotError, read_header, read_snapshot, write_snapshot
+
+
+def _points(count, dim=4):
+    ids = [f"point-{i}" for i in range(count)]
+    vectors = np.arange(count * dim, dtype=np.float32).reshape(count, dim)
+    payloads = [{"question": f"q{i}", "updated_ts": float(i)} for i in range(count)]
+    return ids, vectors, payloads
+
+
+@pytest.mark.parametrize("name_length", range(120))
+def test_round_trip_across_header_sizes(tmp_path, name_length):
+    path = str(tmp_path / "kb.snap")
+    ids, vectors, payloads = _points(3)
+    model_name = "m" * name_length
+
+    write_snapshot(path, ids, vectors, payloads, model_name, created_ts=1.0)
+
+    header = read_header(path)
+    assert header["vectors_offset"] % ALIGNMENT == 0
+    snapshot = read_snapshot(path, model_name=model_name, dim=4)
+    assert snapshot.ids == ids
+    np.testing.assert_array_equal(snapshot.vectors, vectors)
+    assert snapshot.payloads == payloads
+    assert snapshot.max_updated_ts == 2.0
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / "kb.snap")
+    write_snapshot(path, [], np.zeros((0, 4), dtype=np.float32), [], "model", created_ts=1.0)
+
+    snapshot = read_snapshot(path, model_name="model", dim=4)
+    assert len(snapshot) == 0
+
+
+def test_rejects_other_model(tmp_path):
+    path = str(tmp_path / "kb.snap")
+    write_snapshot(path, *_points(1), "model-a", created_ts=1.0)
+
+    with pytest.raises(SnapshotError):
+        read_snapshot(path, model_name="model-b")
@@ -0,0 +1,40 @@
+from app.escalation import TimerWheel
+
+
+def test_advance_returns_timers_as_they_come_due():
+    wheel = TimerWheel(tick_seconds=1, slots=8, now=100)
+    wheel.schedule("a", 103)
+    wheel.schedule("b", 120)  # more than one revolution out
+
+    assert wheel.advance(102) == []
+    assert wheel.advance(104) == ["a"]
+    assert wheel.advance(119) == []
+    assert wheel.advance(120) == ["b"]
+    assert len(wheel) == 0
+
+
+def test_overdue_timer_fires_on_next_tick():
+    wheel = TimerWheel(tick_seconds=1, slots=8, now=100)
+    wheel.schedule("late", 50)
+    assert wheel.advance(101) == ["late"]
+
+
+def test_reschedule_and_cancel():
+    wheel = TimerWheel(tick_seconds=1, slots=8, now=100)
+    wheel.schedule("a", 102)
+    wheel.schedule("a", 105)
+    assert wheel.advance(103) == []
+
+    wheel.schedule("b", 104)
+    assert wheel.cancel("b")
+    assert not wheel.cancel("b")
+    assert wheel.advance(106) == ["a"]
+
+
+def test_advance_after_falling_a_revolution_behind():
+    wheel = TimerWheel(tick_seconds=1, slots=4, now=0)
+    wheel.schedule("a", 2)
+    wheel.schedule("b", 9)
+    wheel.schedule("c", 30)
+    assert sorted(wheel.advance(10)) == ["a", "b"]
+    assert "c" in wheel